@@ -1,27 +1,119 @@
 from random import randint
+import numpy as np
 import pygame
-def get_non_overlapping_spawn(existing_robots, base_x, base_y, x_offset, y_offset, size, max_attempts=100):
+from pytmx.util_pygame import handle_transformation
+def get_non_overlapping_spawn(occupancy, base_x, base_y, x_offset, y_offset, is_blocked, rng=None, max_attempts=100):
+    """
+    Random free grid cell around (base_x, base_y) that is neither a wall nor
+    taken by another robot. Overlap is checked against the occupancy grid
+    (robot index per cell, -1 = free), so each attempt is O(1).
+    """
     for _ in range(max_attempts):
-        x = base_x + randint(-x_offset, x_offset)
-        y = base_y + randint(-y_offset, y_offset)
-        new_rect = pygame.Rect(x, y, size, size)
+        if rng is not None:
+            x = base_x + int(rng.integers(-x_offset, x_offset + 1))
+            y = base_y + int(rng.integers(-y_offset, y_offset + 1))
+        else:
+            x = base_x + randint(-x_offset, x_offset)
+            y = base_y + randint(-y_offset, y_offset)
 
-        # Check collision with already-spawned robots
-        if not any(r.rect.colliderect(new_rect) for r in existing_robots):
+        # Check walls and already-spawned robots
+        if not is_blocked(x, y) and occupancy[x, y] < 0:
             return x, y
 
     raise Exception("Could not find a non-overlapping spawn location.")
 
 
-def get_frame(sprite, frame_index, width, height, rh):
+def pickup_list(locations):
     """
-    Extract one frame from the sprite_sheet attribute of `sprite`.
+    Pickup stations configured for one item type as a list of (x, y): values of
+    pickup_locations may be a single (x, y), a list of them, or None.
+    """
+    if not locations:
+        return []
+    if isinstance(locations[0], (int, np.integer)):
+        return [tuple(locations)]
+    return [tuple(pos) for pos in locations]
+
+
+# Process-wide texture caches, so each image is decoded and converted once.
+# Keys carry whether the surface was converted for a display, because
+# headless loads skip conversion and must not leak into rendering.
+_image_cache = {}
+_frame_cache = {}
+_atlas_cache = {}
+
+
+def load_image(path):
     """
-    frame = pygame.Surface((width, height), pygame.SRCALPHA)
-    frame.blit(sprite.sprite_sheet, (0, 0), (frame_index * width, rh, width, height))
+    Loads an image with per-pixel alpha, cached per process. Conversion to the
+    display format is skipped when no display is open (headless training).
+    """
+    converted = pygame.display.get_surface() is not None
+    key = (path, converted)
+    image = _image_cache.get(key)
+    if image is None:
+        image = pygame.image.load(path)
+        if converted:
+            image = image.convert_alpha()
+        _image_cache[key] = image
+    return image
+
+
+def load_frame(path, frame_index, width, height, rh):
+    """
+    One animation frame cut from the sprite sheet at `path`, cached per
+    process and keyed by path and frame rect. Returned surfaces are shared, so
+    callers must not draw onto them.
+    """
+    rect = (frame_index * width, rh, width, height)
+    key = (path, rect, pygame.display.get_surface() is not None)
+    frame = _frame_cache.get(key)
+    if frame is None:
+        frame = pygame.Surface((width, height), pygame.SRCALPHA)
+        frame.blit(load_image(path), (0, 0), rect)
+        _frame_cache[key] = frame
     return frame
 
 
+def load_atlas(name, build):
+    """
+    Cached animation atlas: whatever `build()` returns (typically lists of
+    pre-composited frames), built once per process and display state.
+    Like load_frame, the surfaces are shared and must not be drawn onto.
+    """
+    key = (name, pygame.display.get_surface() is not None)
+    atlas = _atlas_cache.get(key)
+    if atlas is None:
+        atlas = build()
+        _atlas_cache[key] = atlas
+    return atlas
+
+
+def clear_image_cache():
+    """
+    Drops all cached surfaces, e.g. after the display mode changed.
+    """
+    _image_cache.clear()
+    _frame_cache.clear()
+    _atlas_cache.clear()
+
+
+def headless_image_loader(filename, colorkey, **kwargs):
+    """
+    pytmx image loader that slices tiles without converting them,
+    so TMX tile images can be loaded without a display.
+    """
+    image = pygame.image.load(filename)
+
+    def load_tile(rect=None, flags=None):
+        tile = image.subsurface(rect) if rect else image.copy()
+        if flags:
+            tile = handle_transformation(tile, flags)
+        return tile
+
+    return load_tile
+
+
 
 
 def reset_event_flags(self):
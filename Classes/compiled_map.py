@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pytmx
+from Classes import dropzone as d
+from Classes.Helper.helper import pickup_list
+
+# File layout: MAGIC | uint32 version | uint32 header length | JSON header | padding | arrays.
+# Arrays are stored raw at 64-byte aligned offsets so they can be memory-mapped directly.
+MAGIC = b"WMAP"
+VERSION = 1
+PREAMBLE_SIZE = len(MAGIC) + 8
+ALIGNMENT = 64
+
+
+class CompiledMap:
+    """
+    Collision grid, dropzone masks and metadata of a TMX map, loaded from a
+    compiled artifact. Arrays are copy-on-write memory maps indexed [x, y].
+    """
+    __slots__ = ("path", "header", "width", "height", "tile_width", "tile_height",
+                 "collision_map", "dropzone_masks", "dropzone_types")
+
+    def __init__(self, path, header, arrays):
+        self.path = path
+        self.header = header
+        self.width = header["width"]
+        self.height = header["height"]
+        self.tile_width = header["tile_width"]
+        self.tile_height = header["tile_height"]
+        self.collision_map = arrays["collision_map"]
+        # One mask per delivery zone, in the order of dropzone_types
+        self.dropzone_masks = arrays["dropzone_masks"]
+        self.dropzone_types = header["dropzone_types"]
+
+
+def default_compiled_path(tmx_path):
+    """
+    Compiled artifacts live next to their TMX file.
+    """
+    return os.path.splitext(tmx_path)[0] + ".wmap"
+
+
+def tmx_digest(tmx_path):
+    """
+    Content hash of the TMX file; any edit to it invalidates the artifact.
+    """
+    with open(tmx_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def config_digest(pickup_locations, delivery_zones, collision_layers):
+    """
+    Hash of the pickup/delivery configuration compiled into the artifact.
+    """
+    config = {
+        "pickups": {t: [list(pos) for pos in pickup_list(locations)] for t, locations in sorted(pickup_locations.items())},
+        "zones": {
+            t: [[z.x1, z.y1, z.x2, z.y2, z.accepted_type] for z in d.zone_list(zones)]
+            for t, zones in sorted(delivery_zones.items())
+        },
+        "collision_layers": sorted(collision_layers),
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+def _data_start(header_len):
+    """
+    First aligned byte after the header, where the arrays begin.
+    """
+    return -(-(PREAMBLE_SIZE + header_len) // ALIGNMENT) * ALIGNMENT
+
+
+def compile_map(tmx_path, pickup_locations, delivery_zones, collision_layers=("Walls",), out_path=None):
+    """
+    Parses the TMX layout (no images, no pygame) and writes the compiled artifact.
+    Returns the artifact path.
+    """
+    out_path = out_path or default_compiled_path(tmx_path)
+    tmx_data = pytmx.TiledMap(tmx_path)
+    width, height = tmx_data.width, tmx_data.height
+
+    # Collision grid: any non-zero tile id on a collision layer is a wall
+    collision_map = np.zeros((width, height), dtype=bool)
+    for layer in tmx_data.visible_layers:
+        if layer.name in collision_layers:
+            collision_map |= np.asarray(layer.data).T != 0
+
+    # One mask per item type: union of its dropzone rectangles (bounds inclusive, like Dropzone.contains)
+    dropzone_types = sorted(delivery_zones)
+    dropzone_masks = np.zeros((len(dropzone_types), width, height), dtype=bool)
+    for idx, item_type in enumerate(dropzone_types):
+        for zone in d.zone_list(delivery_zones[item_type]):
+            dropzone_masks[idx, max(zone.x1, 0):zone.x2 + 1, max(zone.y1, 0):zone.y2 + 1] = True
+
+    arrays = {"collision_map": collision_map, "dropzone_masks": dropzone_masks}
+    header = {
+        "version": VERSION,
+        "tmx_sha256": tmx_digest(tmx_path),
+        "config_sha256": config_digest(pickup_locations, delivery_zones, collision_layers),
+        "width": width,
+        "height": height,
+        "tile_width": tmx_data.tilewidth,
+        "tile_height": tmx_data.tileheight,
+        "pickup_locations": {t: [list(pos) for pos in pickup_list(locations)] for t, locations in pickup_locations.items()},
+        "dropzone_types": dropzone_types,
+        "arrays": {},
+    }
+
+    # Lay out arrays after the header, each aligned for memory-mapping
+    offset = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = {"offset": offset, "shape": list(array.shape), "dtype": array.dtype.str}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header_bytes = json.dumps(header).encode()
+    data_start = _data_start(len(header_bytes))
+
+    # Write to a temp file first so concurrent workers never read a partial artifact
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.array([VERSION, len(header_bytes)], dtype="<u4").tobytes())
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header["arrays"][name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def read_header(path):
+    """
+    Reads the JSON header of an artifact and the offset where its arrays start.
+    Returns (None, 0) if the artifact is missing or unreadable.
+    """
+    try:
+        with open(path, "rb") as f:
+            preamble = f.read(PREAMBLE_SIZE)
+            if len(preamble) < PREAMBLE_SIZE or preamble[:len(MAGIC)] != MAGIC:
+                return None, 0
+            version, header_len = (int(v) for v in np.frombuffer(preamble[len(MAGIC):], dtype="<u4"))
+            if version != VERSION:
+                return None, 0
+            header = json.loads(f.read(header_len))
+    except (OSError, ValueError):
+        return None, 0
+    return header, _data_start(header_len)
+
+
+def load_compiled_map(tmx_path, pickup_locations, delivery_zones, collision_layers=("Walls",), path=None):
+    """
+    Memory-maps the compiled artifact for a TMX file, recompiling it first if it is
+    missing or was built from a different TMX or configuration.
+    """
+    path = path or default_compiled_path(tmx_path)
+    header, data_start = read_header(path)
+    if (header is None
+            or header["tmx_sha256"] != tmx_digest(tmx_path)
+            or header["config_sha256"] != config_digest(pickup_locations, delivery_zones, collision_layers)):
+        compile_map(tmx_path, pickup_locations, delivery_zones, collision_layers, out_path=path)
+        header, data_start = read_header(path)
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        shape = tuple(spec["shape"])
+        if 0 in shape:
+            arrays[name] = np.zeros(shape, dtype=spec["dtype"])
+            continue
+        # Copy-on-write: callers may edit their grid without touching the file
+        arrays[name] = np.memmap(path, dtype=spec["dtype"], mode="c", offset=data_start + spec["offset"], shape=shape)
+    return CompiledMap(path, header, arrays)
@@ -0,0 +1,141 @@
+from collections import deque
+import heapq
+import numpy as np
+
+# Distance value for cells that cannot reach the goal (or are walls)
+UNREACHABLE = -1
+
+
+class DistanceField:
+    """
+    Shortest-path distance (in moves) from every cell to the nearest goal cell,
+    computed with BFS over a collision map indexed [x, y]. Walls and cells that
+    cannot reach a goal hold UNREACHABLE.
+    """
+    __slots__ = ("goals", "distances", "width", "height")
+
+    def __init__(self, collision_map, goals):
+        self.width, self.height = collision_map.shape
+        # Goal cells as (x, y); walls among them are simply never reached
+        self.goals = {(int(x), int(y)) for x, y in goals}
+        self.distances = np.full((self.width, self.height), UNREACHABLE, dtype=np.int32)
+        self.rebuild(collision_map)
+
+    def __getitem__(self, cell):
+        """
+        O(1) lookup: field[x, y] -> distance or UNREACHABLE.
+        """
+        return self.distances[cell]
+
+    def neighbors(self, x, y):
+        """
+        In-bounds 4-neighborhood of (x, y), matching Robot.ACTIONS.
+        """
+        if x > 0:
+            yield x - 1, y
+        if x < self.width - 1:
+            yield x + 1, y
+        if y > 0:
+            yield x, y - 1
+        if y < self.height - 1:
+            yield x, y + 1
+
+    def rebuild(self, collision_map):
+        """
+        Full multi-source BFS from all goal cells.
+        """
+        dist = self.distances
+        dist[:] = UNREACHABLE
+        queue = deque()
+        for x, y in self.goals:
+            if 0 <= x < self.width and 0 <= y < self.height and not collision_map[x, y]:
+                dist[x, y] = 0
+                queue.append((x, y))
+
+        while queue:
+            x, y = queue.popleft()
+            next_dist = dist[x, y] + 1
+            for nx, ny in self.neighbors(x, y):
+                if dist[nx, ny] == UNREACHABLE and not collision_map[nx, ny]:
+                    dist[nx, ny] = next_dist
+                    queue.append((nx, ny))
+
+    def block(self, collision_map, x, y):
+        """
+        Repairs the field after (x, y) became a wall. Distances can only grow, and
+        only for cells whose shortest path may run through (x, y): the cells below
+        it in the BFS tree. Those are cleared and re-settled from their boundary.
+        """
+        dist = self.distances
+        if dist[x, y] == UNREACHABLE:
+            return
+
+        # Collect every cell that descends from (x, y) along the distance gradient
+        affected = [(x, y)]
+        seen = {(x, y)}
+        queue = deque(affected)
+        while queue:
+            cx, cy = queue.popleft()
+            child_dist = dist[cx, cy] + 1
+            for nx, ny in self.neighbors(cx, cy):
+                if (nx, ny) not in seen and dist[nx, ny] == child_dist:
+                    seen.add((nx, ny))
+                    affected.append((nx, ny))
+                    queue.append((nx, ny))
+
+        for cx, cy in affected:
+            dist[cx, cy] = UNREACHABLE
+
+        # Re-settle the affected cells from their unaffected neighbors (and goals)
+        heap = []
+        for cx, cy in affected:
+            if collision_map[cx, cy]:
+                continue
+            if (cx, cy) in self.goals:
+                heap.append((0, cx, cy))
+                continue
+            best = min(
+                (dist[nx, ny] for nx, ny in self.neighbors(cx, cy) if dist[nx, ny] != UNREACHABLE),
+                default=None
+            )
+            if best is not None:
+                heap.append((best + 1, cx, cy))
+        heapq.heapify(heap)
+        self._settle(collision_map, heap)
+
+    def unblock(self, collision_map, x, y):
+        """
+        Repairs the field after (x, y) stopped being a wall. Distances can only
+        shrink, so a relaxation wave from (x, y) is enough.
+        """
+        dist = self.distances
+        if (x, y) in self.goals:
+            start = 0
+        else:
+            best = min(
+                (dist[nx, ny] for nx, ny in self.neighbors(x, y) if dist[nx, ny] != UNREACHABLE),
+                default=None
+            )
+            if best is None:
+                return
+            start = best + 1
+        self._settle(collision_map, [(start, x, y)])
+
+    def _settle(self, collision_map, heap):
+        """
+        Dijkstra over unit edges from tentative (distance, x, y) entries,
+        lowering distances until nothing improves.
+        """
+        dist = self.distances
+        while heap:
+            d, x, y = heapq.heappop(heap)
+            current = dist[x, y]
+            if current != UNREACHABLE and current <= d:
+                continue
+            dist[x, y] = d
+            for nx, ny in self.neighbors(x, y):
+                if collision_map[nx, ny]:
+                    continue
+                nd = dist[nx, ny]
+                if nd == UNREACHABLE or nd > d + 1:
+                    heapq.heappush(heap, (d + 1, nx, ny))
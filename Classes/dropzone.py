@@ -9,3 +9,15 @@ class Dropzone:
         Checks if (grid_x, grid_y) is inside the delivery zone.
         """
         return (self.x1 <= grid_x <= self.x2) and (self.y1 <= grid_y <= self.y2)
+
+
+def zone_list(zones):
+    """
+    Dropzones configured for one item type as a list: delivery_zones values
+    may be a single Dropzone, a list of them, or None.
+    """
+    if zones is None:
+        return []
+    if isinstance(zones, Dropzone):
+        return [zones]
+    return list(zones)
@@ -0,0 +1,221 @@
+import asyncio
+import struct
+import time
+import numpy as np
+
+# Socket protocol: each request is one observation as float32 bytes, each reply
+# the action(s) as int64 bytes; both sides know the sizes from the policy's observation shape
+ACTION_DTYPE = np.dtype("<i8")
+OBS_DTYPE = np.dtype("<f4")
+HEADER = struct.Struct("<I")  # payload size in bytes
+
+
+class BatchingInferenceServer:
+    """
+    Coalesces concurrent predict() calls into micro-batches: the first queued
+    request opens a batch, which is run as soon as it holds `max_batch_size`
+    observations or `max_latency_ms` have passed since that first request was
+    queued. Requests pending when the server stops fail with RuntimeError.
+    `policy` is anything with an SB3-style predict(obs_batch, deterministic=True),
+    e.g. numpy_policy.NumpyPolicy or a loaded PPO model. The forward pass runs
+    on the event loop, so keep it short (NumpyPolicy takes microseconds).
+    """
+
+    def __init__(self, policy, observation_shape, max_batch_size=256, max_latency_ms=2.0, stats_capacity=100_000):
+        self.policy = policy
+        self.observation_shape = tuple(observation_shape)
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000.0
+        self.queue = None
+        self.task = None
+        self.obs_batch = np.zeros((max_batch_size, *self.observation_shape), dtype=np.float32)
+
+        # -- Stats: ring buffers of request latencies and per-batch size / queue depth --
+        self.latencies = np.zeros(stats_capacity, dtype=np.float64)
+        self.batch_sizes = np.zeros(stats_capacity, dtype=np.int32)
+        self.queue_depths = np.zeros(stats_capacity, dtype=np.int32)
+        self.requests_served = 0
+        self.batches_run = 0
+
+    # ====== Lifecycle ======
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self.batch_loop())
+        return self
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        # Requests still queued would otherwise never be answered
+        while self.queue is not None and not self.queue.empty():
+            _, future, _ = self.queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Inference server stopped"))
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    # ====== Requests ======
+
+    async def predict(self, observation):
+        """
+        Action for one observation, answered together with whatever else
+        arrived within the same batch window.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((observation, future, time.perf_counter()))
+        return await future
+
+    async def batch_loop(self):
+        queue = self.queue
+        while True:
+            batch = [await queue.get()]
+            try:
+                # The window opens when the oldest request was queued, not when it was taken
+                deadline = batch[0][2] + self.max_latency
+                # Take what is already queued, then wait for more until full or the deadline
+                while len(batch) < self.max_batch_size:
+                    if queue.empty():
+                        timeout = deadline - time.perf_counter()
+                        if timeout <= 0:
+                            break
+                        try:
+                            batch.append(await asyncio.wait_for(queue.get(), timeout))
+                        except asyncio.TimeoutError:
+                            break
+                    else:
+                        batch.append(queue.get_nowait())
+            except asyncio.CancelledError:
+                # stop() while collecting: fail the requests already taken from the queue
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("Inference server stopped"))
+                raise
+            # Queue depth = requests waiting when the batch runs (its own plus those left queued)
+            self.run_batch(batch, len(batch) + queue.qsize())
+
+    def run_batch(self, batch, queue_depth):
+        size = len(batch)
+        obs = self.obs_batch[:size]
+        for row, (observation, _, _) in enumerate(batch):
+            obs[row] = observation
+        try:
+            actions, _ = self.policy.predict(obs, deterministic=True)
+        except Exception as error:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        now = time.perf_counter()
+        capacity = len(self.latencies)
+        for row, (_, future, queued_at) in enumerate(batch):
+            if not future.done():  # the caller may have been cancelled
+                future.set_result(actions[row])
+            self.latencies[self.requests_served % capacity] = now - queued_at
+            self.requests_served += 1
+        self.batch_sizes[self.batches_run % capacity] = size
+        self.queue_depths[self.batches_run % capacity] = queue_depth
+        self.batches_run += 1
+
+    # ====== Stats ======
+
+    def stats(self):
+        """
+        Requests and batches so far, mean batch size, queue depth (requests
+        waiting when a batch ran, and now), and latency percentiles in
+        milliseconds over the last stats_capacity requests.
+        """
+        latencies = self.latencies[:min(self.requests_served, len(self.latencies))] * 1000.0
+        batches = min(self.batches_run, len(self.batch_sizes))
+        stats = {
+            "requests": self.requests_served,
+            "batches": self.batches_run,
+            "mean_batch_size": float(self.batch_sizes[:batches].mean()) if batches else 0.0,
+            "mean_queue_depth": float(self.queue_depths[:batches].mean()) if batches else 0.0,
+            "max_queue_depth": int(self.queue_depths[:batches].max()) if batches else 0,
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+        }
+        for q in (50, 90, 99):
+            stats[f"latency_p{q}_ms"] = float(np.percentile(latencies, q)) if len(latencies) else 0.0
+        return stats
+
+    # ====== Socket front end ======
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        """
+        Starts a TCP server answering HEADER-framed float32 observations with
+        int64 actions (see InferenceClient). Returns the asyncio server.
+        """
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+                payload = await reader.readexactly(size)
+                obs = np.frombuffer(payload, dtype=OBS_DTYPE).reshape(self.observation_shape)
+                action = np.asarray(await self.predict(obs), dtype=ACTION_DTYPE)
+                writer.write(HEADER.pack(action.nbytes) + action.tobytes())
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+class InferenceClient:
+    """
+    One connection to a BatchingInferenceServer socket; one request in flight at a time.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=8765):
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def predict(self, observation):
+        payload = np.ascontiguousarray(observation, dtype=OBS_DTYPE).tobytes()
+        self.writer.write(HEADER.pack(len(payload)) + payload)
+        await self.writer.drain()
+        (size,) = HEADER.unpack(await self.reader.readexactly(HEADER.size))
+        action = np.frombuffer(await self.reader.readexactly(size), dtype=ACTION_DTYPE)
+        return action[0] if action.size == 1 else action
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def run_fleet(envs, predict, steps, seed=0):
+    """
+    Simulated fleet: every env runs as its own task, asking for an action each
+    step and resetting when done. `predict` is one coroutine function for all
+    envs (server.predict) or a list with one per env (InferenceClient.predict).
+    Returns the total steps taken.
+    """
+    predicts = predict if isinstance(predict, list) else [predict] * len(envs)
+
+    async def drive(idx, env):
+        obs, _ = env.reset(seed=seed + idx)
+        for _ in range(steps):
+            # The server copies obs into its batch before answering, so step()
+            # may overwrite its observation buffer afterwards
+            obs, _, terminated, truncated, _ = env.step(await predicts[idx](obs))
+            if terminated or truncated:
+                obs, _ = env.reset()
+        return steps
+
+    return sum(await asyncio.gather(*(drive(idx, env) for idx, env in enumerate(envs))))
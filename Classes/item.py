@@ -1,4 +1,5 @@
 import pygame
+from Classes.Helper.helper import load_image
 
 class Item(pygame.sprite.Sprite):
     def __init__(self, grid_pos, tile_size, groups, item_type):
@@ -8,11 +9,11 @@ class Item(pygame.sprite.Sprite):
         self.tile_size = tile_size
         self.item_type = item_type
 
-        # Load image based on item type
+        # Load image based on item type (decoded once per process, see helper.load_image)
         if item_type == 'B':
-            self.image = pygame.image.load('Assets/images/Hospital_Black_Shadow_Singles_32x32_317.png').convert_alpha()
+            self.image = load_image('Assets/images/Hospital_Black_Shadow_Singles_32x32_317.png')
         else:
-            self.image = pygame.image.load('Assets/images/Hospital_Black_Shadow_Singles_32x32_318.png').convert_alpha()
+            self.image = load_image('Assets/images/Hospital_Black_Shadow_Singles_32x32_318.png')
 
         # Position on screen based on grid
         pixel_pos = (self.grid_x * tile_size, self.grid_y * tile_size)
@@ -1,5 +1,11 @@
+import numpy as np
 import pygame
+import pytmx
 from pytmx.util_pygame import load_pygame
+from Classes import compiled_map as cm
+from Classes import distance_field as df
+from Classes import dropzone as d
+from Classes.Helper.helper import headless_image_loader, pickup_list
 
 class Tile(pygame.sprite.Sprite):
     """
@@ -18,45 +24,188 @@ class Map:
     """
     Complete map consistent of tiles from tmx data.
     """
-    def __init__(self, tmx_path, all_sprites_group, render_layer_group, pickup_locations, delivery_zones):
-        # Load TMX map
-        self.tmx_data = load_pygame(tmx_path)
-        self.tile_width = self.tmx_data.tilewidth
-        self.tile_height = self.tmx_data.tileheight
-        self.width = self.tmx_data.width
-        self.height = self.tmx_data.height
+    def __init__(self, tmx_path, all_sprites_group, render_layer_group, pickup_locations, delivery_zones, use_compiled=False,
+                 layout=None):
+        # Define which TMX layers count as walls/obstacles
+        self.collision_layers = {
+            "Walls"
+        }
+
+        self.tmx_path = tmx_path
+        # In-memory map from map_generator (no TMX file; rendered as plain wall/floor cells)
+        self.layout = layout
+        if layout is not None:
+            self.compiled = None
+            self.tmx_data = None
+            self.tile_width = self.tile_height = layout.tile_size
+            self.width = layout.width
+            self.height = layout.height
+        elif use_compiled:
+            # Memory-map the compiled artifact (rebuilt automatically if the TMX changed)
+            self.compiled = cm.load_compiled_map(tmx_path, pickup_locations, delivery_zones, self.collision_layers)
+            self.tmx_data = None
+            self.tile_width = self.compiled.tile_width
+            self.tile_height = self.compiled.tile_height
+            self.width = self.compiled.width
+            self.height = self.compiled.height
+        else:
+            # Parse TMX layout only; tileset images are loaded lazily by load_tiles()
+            self.compiled = None
+            self.tmx_data = pytmx.TiledMap(tmx_path)
+            self.tile_width = self.tmx_data.tilewidth
+            self.tile_height = self.tmx_data.tileheight
+            self.width = self.tmx_data.width
+            self.height = self.tmx_data.height
 
         # Master draw/update group containing all layers and sprites
         self.all_sprites_group = all_sprites_group
         # Holds ONLY the map tile sprites (background layer)
         self.render_layer_group = render_layer_group
 
-        # 2D array to act as a map indicating which tiles are passable and which aren't
-        self.collision_map = [
-            [False for _ in range(self.height)] for _ in range(self.width)
-        ]
+        # 2D array to act as a map indicating which tiles are passable and which aren't,
+        # indexed as collision_map[x][y]
+        self.collision_map = np.zeros((self.width, self.height), dtype=bool)
+        # Bumped by set_blocked, so caches of paths over the walls know when to drop them
+        self.wall_version = 0
 
-        # Store pickup points (single tile per item type)
-        self.pickup_locations = pickup_locations  # e.g. {"ItemA": (x, y)}
-        # Store delivery zones as rectangles per item type
-        self.delivery_zones = delivery_zones  # e.g. {"ItemA": {"x1": x, "y1": y, "x2": x2, "y2": y2}}
+        # Store pickup stations per item type: one (x, y) or a list of them
+        self.pickup_locations = pickup_locations  # e.g. {"ItemA": (x, y)} or {"ItemA": [(x, y), ...]}
+        # Store delivery zones as rectangles per item type; a type may have a list of zones,
+        # and zones may overlap
+        self.delivery_zones = delivery_zones  # e.g. {"ItemA": Dropzone(...)} or {"ItemA": [Dropzone(...), ...]}
+        self.dropzones = {item_type: d.zone_list(zones) for item_type, zones in delivery_zones.items()}
+
+        # Tile sprites are only needed for rendering
+        self.tiles_loaded = False
+        # Static layers and grid pre-composited by render_background()
+        self.background = None
 
         # Load walls/obstacles from TMX layers
-        self.load_tiles()
+        if self.compiled is not None:
+            self.collision_map = self.compiled.collision_map
+        elif self.layout is not None:
+            self.collision_map = self.layout.collision_map()
+        else:
+            self.build_collision_map()
 
-    def load_tiles(self):
+        # Per-cell pickup and dropzone lookup, so resolving a robot's cell is O(1)
+        self.build_zone_index()
+
+        # Shortest-path distances to every pickup and dropzone, kept in sync with walls
+        self.build_distance_fields()
+
+    def build_collision_map(self):
         """
-        Loads tile layers from TMX, builds a collision map, and adds Tile sprites
-        to the sprite groups for rendering.
+        Builds the collision map from the tile ids of the TMX layers.
+        Needs no images and no display, so it is safe for headless training.
         """
+        for layer in self.tmx_data.visible_layers:
+            if layer.name not in self.collision_layers:
+                continue
+            # layer.data is row-major (y, x); any non-zero tile id is a wall
+            self.collision_map |= np.asarray(layer.data).T != 0
 
-        # Define which TMX layers count as walls/obstacles
-        collision_layers = {
-            "Walls"
+    def build_zone_index(self):
+        """
+        Builds the cell index grids, both indexed [x, y]:
+        - pickup_ids: index of the pickup station on the cell, -1 if none; station i
+          holds items of pickup_types[i] and sits at pickup_positions[i]
+        - dropzone_ids: id of the set of item types accepted on the cell, 0 if it
+          is in no dropzone; dropzone_accepts[id] is that set. Cells where zones
+          of several types overlap get the id of the combined set.
+        """
+        stations = [(item_type, pos) for item_type, locations in self.pickup_locations.items()
+                    for pos in pickup_list(locations)]
+        self.pickup_types = [item_type for item_type, _ in stations]
+        self.pickup_positions = np.array([pos for _, pos in stations], dtype=np.int32).reshape(-1, 2)
+        self.pickup_ids = np.full((self.width, self.height), -1, dtype=np.int32)
+        self.pickup_ids[self.pickup_positions[:, 0], self.pickup_positions[:, 1]] = np.arange(len(stations))
+
+        self.dropzone_ids = np.zeros((self.width, self.height), dtype=np.int32)
+        self.dropzone_accepts = [frozenset()]
+        set_ids = {frozenset(): 0}
+        if self.compiled is not None:
+            # The artifact already holds one cell mask per item type
+            regions = list(zip(self.compiled.dropzone_types, self.compiled.dropzone_masks))
+        else:
+            regions = [(zone.accepted_type, np.s_[max(zone.x1, 0):zone.x2 + 1, max(zone.y1, 0):zone.y2 + 1])
+                       for zones in self.dropzones.values() for zone in zones]
+        for accepted_type, region in regions:
+            cells = self.dropzone_ids[region]
+            # Remap every accept set already present in the region to that set + this type
+            for old_id in np.unique(cells).tolist():
+                accepts = self.dropzone_accepts[old_id] | {accepted_type}
+                if accepts not in set_ids:
+                    set_ids[accepts] = len(self.dropzone_accepts)
+                    self.dropzone_accepts.append(accepts)
+                cells[cells == old_id] = set_ids[accepts]
+            # A mask selects a copy of the cells, a rectangle a view
+            self.dropzone_ids[region] = cells
+
+    def pickup_stations(self, item_types):
+        """
+        The pickup stations holding any of `item_types`, renumbered 0..S-1.
+        Returns their positions (S, 2), the index into item_types of each
+        station's type (S,), and a grid [x, y] of station numbers (-1: none).
+        """
+        type_index = {item_type: idx for idx, item_type in enumerate(item_types)}
+        stations = [idx for idx, item_type in enumerate(self.pickup_types) if item_type in type_index]
+        # Trailing -1 entry is what cells without a station (-1) index into
+        renumber = np.full(len(self.pickup_types) + 1, -1, dtype=np.int32)
+        renumber[stations] = np.arange(len(stations))
+        station_types = np.array([type_index[self.pickup_types[idx]] for idx in stations], dtype=np.int32)
+        return self.pickup_positions[stations], station_types, renumber[self.pickup_ids]
+
+    def dropzone_accept_table(self, item_types):
+        """
+        Bool table [dropzone id, item type index] for the given item types, with a
+        trailing all-False column for index -1 (nothing held). Lets batched code
+        resolve deliveries as table[dropzone_ids[x, y], held].
+        """
+        table = np.zeros((len(self.dropzone_accepts), len(item_types) + 1), dtype=bool)
+        for zone_id, accepts in enumerate(self.dropzone_accepts):
+            for idx, item_type in enumerate(item_types):
+                table[zone_id, idx] = item_type in accepts
+        return table
+
+    def build_distance_fields(self):
+        """
+        BFS distance fields per item type: to its pickup cell and to its dropzone rectangle.
+        """
+        self.pickup_distances = {
+            item_type: df.DistanceField(self.collision_map, pickup_list(locations))
+            for item_type, locations in self.pickup_locations.items() if locations
         }
+        self.dropzone_distances = {
+            item_type: df.DistanceField(
+                self.collision_map,
+                [(x, y) for zone in zones for x in range(zone.x1, zone.x2 + 1) for y in range(zone.y1, zone.y2 + 1)]
+            )
+            for item_type, zones in self.dropzones.items() if zones
+        }
+        # Per-station fields (index into pickup_positions), built on first use by distance_to_station
+        self.station_distances = {}
 
-        for layer in self.tmx_data.visible_layers:
-            is_collision = layer.name in collision_layers
+    def load_tiles(self):
+        """
+        Loads tile images from TMX and adds Tile sprites to the sprite groups
+        for rendering. Only called once a render mode needs them.
+        """
+        if self.tiles_loaded:
+            return
+        self.tiles_loaded = True
+        if self.tmx_path is None:
+            # Generated layouts have no tile images; render_background draws their cells
+            return
+
+        # Convert tiles for the display if one is open, otherwise keep them as loaded
+        if pygame.display.get_surface() is not None:
+            tmx_images = load_pygame(self.tmx_path)
+        else:
+            tmx_images = pytmx.TiledMap(self.tmx_path, image_loader=headless_image_loader)
+
+        for layer in tmx_images.visible_layers:
+            is_collision = layer.name in self.collision_layers
 
             for x, y, surf in layer.tiles():
                 # Place tile sprite at pixel position
@@ -68,9 +217,22 @@ class Map:
                 groups = (self.all_sprites_group, self.render_layer_group)
                 Tile(pos=pos, surf=surf, groups=groups, is_collision=is_collision)
 
-                # Mark collision in logic grid
-                if is_collision:
-                    self.collision_map[x][y] = True
+    def render_background(self):
+        """
+        Returns the static map layers with the grid overlay, composited once
+        into a single surface so frames only need one blit for the background.
+        """
+        if self.background is None:
+            self.load_tiles()
+            background = pygame.Surface((self.width * self.tile_width, self.height * self.tile_height))
+            if pygame.display.get_surface() is not None:
+                background = background.convert()
+            if self.tmx_path is None:
+                self.draw_cells(background)
+            self.render_layer_group.draw(background)
+            self.draw_grid_debug(background)
+            self.background = background
+        return self.background
 
     # ====== RL Environment Logic API ======
 
@@ -86,30 +248,100 @@ class Map:
         """
         if not self.is_within_bounds(x, y):
             return True
-        return self.collision_map[x][y]
+        return bool(self.collision_map[x, y])
+
+    def set_blocked(self, x, y, blocked=True):
+        """
+        Adds or removes an obstacle at (x,y) and repairs the distance fields
+        incrementally instead of rebuilding them. The cached background is
+        dropped; render_background() rebuilds it on the next frame.
+        """
+        if bool(self.collision_map[x, y]) == blocked:
+            return
+        self.collision_map[x, y] = blocked
+        self.wall_version += 1
+        self.background = None
+        fields = (*self.pickup_distances.values(), *self.dropzone_distances.values(), *self.station_distances.values())
+        for field in fields:
+            if blocked:
+                field.block(self.collision_map, x, y)
+            else:
+                field.unblock(self.collision_map, x, y)
+
+    def distance_to_pickup(self, item_type, x, y):
+        """
+        Moves from (x,y) to the pickup of item type, or distance_field.UNREACHABLE.
+        """
+        field = self.pickup_distances.get(item_type)
+        if field is None or not self.is_within_bounds(x, y):
+            return df.UNREACHABLE
+        return int(field[x, y])
+
+    def distance_to_station(self, station, x, y):
+        """
+        Moves from (x,y) to one pickup station (index into pickup_positions), or distance_field.UNREACHABLE.
+        """
+        if not self.is_within_bounds(x, y):
+            return df.UNREACHABLE
+        field = self.station_distances.get(station)
+        if field is None:
+            field = df.DistanceField(self.collision_map, [self.pickup_positions[station]])
+            self.station_distances[station] = field
+        return int(field[x, y])
+
+    def distance_to_dropzone(self, item_type, x, y):
+        """
+        Moves from (x,y) into the delivery zone of item type, or distance_field.UNREACHABLE.
+        """
+        field = self.dropzone_distances.get(item_type)
+        if field is None or not self.is_within_bounds(x, y):
+            return df.UNREACHABLE
+        return int(field[x, y])
 
     def get_pickup_location(self, item_type):
         """
-        Returns single (x, y) pickup location for item type.
-        Used to spawn Items in Environment.
+        Returns the (first) (x, y) pickup location for item type.
         """
-        return self.pickup_locations.get(item_type)
+        locations = pickup_list(self.pickup_locations.get(item_type))
+        return locations[0] if locations else None
 
     def get_delivery_zone(self, item_type):
         """
-        Returns delivery zone rectangle for item type.
-        Format: {"x1": x, "y1": y, "x2": x2, "y2": y2}
+        Returns the (first) delivery zone rectangle for item type.
         """
-        return self.delivery_zones.get(item_type)
+        zones = self.dropzones.get(item_type)
+        return zones[0] if zones else None
+
+    def get_delivery_zones(self, item_type):
+        """
+        Returns all delivery zone rectangles for item type.
+        """
+        return self.dropzones.get(item_type, [])
+
+    def accepted_types_at(self, x, y):
+        """
+        Set of item types that can be delivered on (x, y); empty outside dropzones.
+        """
+        return self.dropzone_accepts[self.dropzone_ids[x, y]]
 
     def is_in_delivery_zone(self, item_type, x, y):
         """
-        Returns True if (x,y) is inside delivery rectangle for item type.
+        Returns True if (x,y) is inside a delivery rectangle for item type.
         """
-        zone = self.get_delivery_zone(item_type)
-        if not zone:
+        if not self.is_within_bounds(x, y):
             return False
-        return zone.contains(x, y)
+        return item_type in self.accepted_types_at(x, y)
+
+    def draw_cells(self, surface):
+        """
+        Draws floor, dropzones and walls as flat colours, for maps without tile images.
+        """
+        surface.fill((60, 60, 60))
+        for zone in (zone for zones in self.dropzones.values() for zone in zones):
+            surface.fill((40, 90, 60), (zone.x1 * self.tile_width, zone.y1 * self.tile_height,
+                                        (zone.x2 - zone.x1 + 1) * self.tile_width, (zone.y2 - zone.y1 + 1) * self.tile_height))
+        for x, y in np.argwhere(self.collision_map):
+            surface.fill((20, 20, 20), (x * self.tile_width, y * self.tile_height, self.tile_width, self.tile_height))
 
     def draw_grid_debug(self, surface):
         """
@@ -0,0 +1,143 @@
+import os
+import numpy as np
+from Classes import dropzone as d
+
+# Tile ids written to generated TMX files (Floor.tsx at firstgid 1, Walls.tsx at firstgid 601)
+FLOOR_GID = 561
+WALL_GID = 1517
+TSX_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Assets", "tsx")
+
+MAX_SIZE = 512
+
+
+class WarehouseLayout:
+    """
+    Generated warehouse: walls, pickup stations, dropzones and a robot start.
+    Walls are stored bit-packed per row (height x ceil(width / 8) bytes, 32 KiB
+    at 512x512); collision_map() unpacks them into the bool grid Map uses.
+    """
+    __slots__ = ("width", "height", "tile_size", "packed_walls", "pickup_locations", "delivery_zones",
+                 "robot_start_pos", "seed")
+
+    def __init__(self, width, height, walls, pickup_locations, delivery_zones, robot_start_pos, seed=None, tile_size=32):
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        # walls is indexed [x, y] like Map.collision_map; rows are packed along x
+        self.packed_walls = np.packbits(np.asarray(walls, dtype=bool).T, axis=1)
+        self.pickup_locations = pickup_locations
+        self.delivery_zones = delivery_zones
+        self.robot_start_pos = robot_start_pos
+        self.seed = seed
+
+    def collision_map(self):
+        """
+        Unpacked walls as a bool array indexed [x, y].
+        """
+        return np.ascontiguousarray(np.unpackbits(self.packed_walls, axis=1, count=self.width).T.astype(bool))
+
+    def is_blocked(self, x, y):
+        """
+        Wall test straight on the packed bits; outside the map counts as blocked.
+        """
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return True
+        return bool(self.packed_walls[y, x >> 3] & (0x80 >> (x & 7)))
+
+    def map_kwargs(self):
+        """
+        Keyword arguments for Map (and map_kwargs in train_agent.py) built from this layout in memory.
+        """
+        return {
+            "tmx_path": None,
+            "layout": self,
+            "pickup_locations": self.pickup_locations,
+            "delivery_zones": self.delivery_zones,
+        }
+
+
+def generate_warehouse(width, height, seed=None, item_types=("A", "B"), aisle_width=2, shelf_depth=2,
+                       block_length=8, dock_depth=4, dropzone_size=(4, 2)):
+    """
+    Seeded warehouse layout of up to MAX_SIZE x MAX_SIZE cells: outer walls,
+    columns of shelves (shelf_depth wide) separated by vertical aisles and cut
+    into blocks by cross aisles, a free strip along the top for the robot start
+    and a dock strip along the bottom holding one dropzone per item type.
+    Each item type gets one pickup station on an aisle cell next to a shelf.
+    Every floor cell stays reachable from every other one.
+    """
+    if not (16 <= width <= MAX_SIZE and 16 <= height <= MAX_SIZE):
+        raise ValueError(f"Map size must be between 16 and {MAX_SIZE} per side, got {width}x{height}")
+    if aisle_width < 1 or shelf_depth < 1:
+        raise ValueError("aisle_width and shelf_depth must be at least 1")
+    rng = np.random.default_rng(seed)
+
+    walls = np.zeros((width, height), dtype=bool)
+    walls[[0, -1], :] = True
+    walls[:, [0, -1]] = True
+
+    # Shelf area between the top strip and the dock, both kept free of shelves
+    shelf_top = 1 + aisle_width
+    shelf_bottom = height - 1 - dock_depth - aisle_width  # exclusive
+    x = 1 + aisle_width
+    while x + shelf_depth <= width - 1 - aisle_width:
+        y = shelf_top
+        while y < shelf_bottom:
+            # Block lengths vary a little per column so layouts differ between seeds
+            length = min(int(rng.integers(max(block_length // 2, 1), block_length + 1)), shelf_bottom - y)
+            walls[x:x + shelf_depth, y:y + length] = True
+            y += length + aisle_width
+        x += shelf_depth + aisle_width
+
+    # Pickup stations: aisle cells with a shelf to the left or right
+    floor = ~walls
+    beside_shelf = np.zeros_like(walls)
+    beside_shelf[1:-1, 1:-1] = floor[1:-1, 1:-1] & (walls[:-2, 1:-1] | walls[2:, 1:-1])
+    beside_shelf[:, :shelf_top] = False
+    beside_shelf[:, shelf_bottom:] = False
+    candidates = np.argwhere(beside_shelf)
+    if len(candidates) < len(item_types):
+        raise ValueError("Layout has too few shelf cells for one pickup station per item type")
+    picks = rng.choice(len(candidates), size=len(item_types), replace=False)
+    pickup_locations = {item_type: tuple(int(v) for v in candidates[idx]) for item_type, idx in zip(item_types, picks)}
+
+    # Dropzones: side by side in the dock strip, shifted by a seeded offset
+    zone_w, zone_h = dropzone_size
+    spacing = (width - 2) // len(item_types)
+    if spacing < zone_w:
+        raise ValueError("Map is too narrow for one dropzone per item type")
+    delivery_zones = {}
+    y2 = height - 2
+    for idx, item_type in enumerate(item_types):
+        x1 = 1 + idx * spacing + int(rng.integers(0, spacing - zone_w + 1))
+        delivery_zones[item_type] = d.Dropzone((x1, y2 - zone_h + 1), (x1 + zone_w - 1, y2), item_type)
+
+    robot_start_pos = (width // 2, 1 + aisle_width // 2)
+    return WarehouseLayout(width, height, walls, pickup_locations, delivery_zones, robot_start_pos, seed=seed)
+
+
+def write_tmx(layout, path):
+    """
+    Writes the layout as a TMX map with a Floor and a Walls layer, using the
+    repo's tilesets so it loads (and renders) like the hand-built maps.
+    """
+    walls = layout.collision_map().T  # rows = y
+    floor_rows = np.where(walls, 0, FLOOR_GID)
+    wall_rows = np.where(walls, WALL_GID, 0)
+    tsx_dir = os.path.relpath(TSX_DIR, os.path.dirname(os.path.abspath(path)))
+
+    def csv(rows):
+        return ",\n".join(",".join(map(str, row)) for row in rows.tolist())
+
+    width, height, tile = layout.width, layout.height, layout.tile_size
+    with open(path, "w") as f:
+        f.write(
+            f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<map version="1.10" orientation="orthogonal" renderorder="right-down" width="{width}" height="{height}" '
+            f'tilewidth="{tile}" tileheight="{tile}" infinite="0" nextlayerid="3" nextobjectid="1">\n'
+            f' <tileset firstgid="1" source="{tsx_dir}/Floor.tsx"/>\n'
+            f' <tileset firstgid="601" source="{tsx_dir}/Walls.tsx"/>\n'
+            f' <layer id="1" name="Floor" width="{width}" height="{height}">\n  <data encoding="csv">\n{csv(floor_rows)}\n</data>\n </layer>\n'
+            f' <layer id="2" name="Walls" width="{width}" height="{height}">\n  <data encoding="csv">\n{csv(wall_rows)}\n</data>\n </layer>\n'
+            f'</map>\n'
+        )
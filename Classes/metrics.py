@@ -0,0 +1,100 @@
+import numpy as np
+
+# Per-episode counters, in ring buffer column order
+METRIC_FIELDS = (
+    "deliveries",
+    "pickups",
+    "wall_collisions",
+    "robot_collisions",
+    "wrong_pickups",
+    "wrong_drops",
+    "steps_to_first_pickup",  # -1 if the episode had no pickup
+    "episode_steps",
+)
+
+
+class EpisodeMetrics:
+    """
+    Typed event counters for the running episode, plus a preallocated ring
+    buffer with the counters of the last `capacity` finished episodes.
+    Counters are fed from the RobotState event flags after each move.
+    """
+    __slots__ = (*METRIC_FIELDS, "history", "episodes_recorded")
+
+    def __init__(self, capacity=1000):
+        self.history = np.zeros((capacity, len(METRIC_FIELDS)), dtype=np.int32)
+        self.episodes_recorded = 0
+        self.start_episode()
+
+    def start_episode(self):
+        """
+        Zeroes the counters of the running episode.
+        """
+        self.deliveries = 0
+        self.pickups = 0
+        self.wall_collisions = 0
+        self.robot_collisions = 0
+        self.wrong_pickups = 0
+        self.wrong_drops = 0
+        self.steps_to_first_pickup = -1
+        self.episode_steps = 0
+
+    def record_robot(self, robot, step):
+        """
+        Counts the events one robot raised during the current step.
+        """
+        if robot.collided_with_wall:
+            self.wall_collisions += 1
+        if robot.collided_with_robot:
+            self.robot_collisions += 1
+        if robot.just_picked_up:
+            self.pickups += 1
+            if self.steps_to_first_pickup < 0:
+                self.steps_to_first_pickup = step
+        if robot.just_tried_wrong_pickup:
+            self.wrong_pickups += 1
+        if robot.just_delivered:
+            self.deliveries += 1
+        if robot.just_tried_wrong_drop:
+            self.wrong_drops += 1
+
+    def end_episode(self, steps):
+        """
+        Stores the running episode in the ring buffer and returns its counters as a dict.
+        """
+        self.episode_steps = steps
+        row = [getattr(self, name) for name in METRIC_FIELDS]
+        self.push(row)
+        self.start_episode()
+        return dict(zip(METRIC_FIELDS, row))
+
+    def push(self, row):
+        """
+        Writes one finished episode (values in METRIC_FIELDS order) into the ring buffer.
+        """
+        self.history[self.episodes_recorded % len(self.history)] = row
+        self.episodes_recorded += 1
+
+    def recent(self):
+        """
+        Counters of the buffered episodes, oldest first, shape (n, len(METRIC_FIELDS)).
+        """
+        capacity = len(self.history)
+        if self.episodes_recorded <= capacity:
+            return self.history[:self.episodes_recorded]
+        start = self.episodes_recorded % capacity
+        return np.concatenate([self.history[start:], self.history[:start]])
+
+    def summary(self):
+        """
+        Mean of every counter over the buffered episodes.
+        """
+        recent = self.recent()
+        if not len(recent):
+            return {}
+        result = dict(zip(METRIC_FIELDS, recent.mean(axis=0).tolist()))
+        # Episodes without a pickup (-1) are left out of the first-pickup mean
+        first_pickup = recent[:, METRIC_FIELDS.index("steps_to_first_pickup")]
+        first_pickup = first_pickup[first_pickup >= 0]
+        result["steps_to_first_pickup"] = float(first_pickup.mean()) if len(first_pickup) else -1.0
+        return result
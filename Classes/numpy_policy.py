@@ -0,0 +1,102 @@
+import numpy as np
+
+# Hidden-layer activations of SB3 MlpPolicy (policy_kwargs activation_fn), applied in place
+ACTIVATIONS = {
+    "Tanh": lambda x: np.tanh(x, out=x),
+    "ReLU": lambda x: np.maximum(x, 0.0, out=x),
+    "Identity": lambda x: x,
+}
+
+
+def export_policy(model, path):
+    """
+    Writes the actor of an SB3 PPO/A2C MlpPolicy (Discrete or MultiDiscrete
+    actions, flat Box observations) to a compressed .npz: the policy_net
+    Linear layers and the action_net, as float32 weights.
+    Needs torch only here; NumpyPolicy reads the file with NumPy alone.
+    """
+    from gymnasium import spaces
+    from torch import nn
+    from stable_baselines3.common.torch_layers import FlattenExtractor
+
+    policy = model.policy
+    if not isinstance(policy.pi_features_extractor, FlattenExtractor):
+        raise ValueError("Only MlpPolicy (FlattenExtractor) policies can be exported")
+    if isinstance(model.action_space, spaces.Discrete):
+        nvec = np.array([model.action_space.n], dtype=np.int64)
+    elif isinstance(model.action_space, spaces.MultiDiscrete):
+        nvec = np.asarray(model.action_space.nvec, dtype=np.int64).ravel()
+    else:
+        raise ValueError(f"Unsupported action space {model.action_space}")
+
+    layers = [module for module in policy.mlp_extractor.policy_net if isinstance(module, nn.Linear)]
+    layers.append(policy.action_net)
+    arrays = {}
+    for idx, layer in enumerate(layers):
+        # Stored (in, out) so a batch is multiplied as obs @ weight
+        arrays[f"weight_{idx}"] = layer.weight.detach().cpu().numpy().T.astype(np.float32)
+        arrays[f"bias_{idx}"] = layer.bias.detach().cpu().numpy().astype(np.float32)
+    np.savez_compressed(
+        path,
+        activation=np.array(policy.activation_fn.__name__),
+        action_nvec=nvec,
+        multi_discrete=np.array(isinstance(model.action_space, spaces.MultiDiscrete)),
+        observation_shape=np.array(model.observation_space.shape, dtype=np.int64),
+        **arrays
+    )
+
+
+class NumpyPolicy:
+    """
+    Deterministic actions of an exported MlpPolicy (see export_policy) with
+    NumPy only: no torch or stable-baselines3 import, so loading takes
+    milliseconds. predict() mirrors SB3's signature and output shapes.
+    """
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            num_layers = sum(1 for name in data.files if name.startswith("weight_"))
+            self.weights = [np.ascontiguousarray(data[f"weight_{idx}"]) for idx in range(num_layers)]
+            self.biases = [data[f"bias_{idx}"] for idx in range(num_layers)]
+            activation = str(data["activation"])
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation {activation!r}, expected one of {tuple(ACTIVATIONS)}")
+            self.activation = ACTIVATIONS[activation]
+            self.action_nvec = data["action_nvec"]
+            self.multi_discrete = bool(data["multi_discrete"])
+            self.observation_shape = tuple(data["observation_shape"].tolist())
+        self.observation_size = int(np.prod(self.observation_shape))
+        # Logit column where each action dimension starts
+        self.action_splits = np.cumsum(self.action_nvec)[:-1]
+
+    def logits(self, obs):
+        """
+        Action logits for a (batch, obs_dim) float array.
+        """
+        x = obs
+        last = len(self.weights) - 1
+        for idx, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            x = x @ weight
+            x += bias
+            if idx < last:
+                x = self.activation(x)
+        return x
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        """
+        Most likely action per observation, returned as (actions, None) like
+        SB3's model.predict; a single observation gives an unbatched action.
+        Only deterministic prediction is supported.
+        """
+        if not deterministic:
+            raise ValueError("NumpyPolicy only predicts deterministic actions")
+        obs = np.asarray(observation, dtype=np.float32)
+        single = obs.shape == self.observation_shape
+        obs = obs.reshape(-1, self.observation_size)
+
+        logits = self.logits(obs)
+        if self.multi_discrete:
+            actions = np.stack([part.argmax(axis=1) for part in np.split(logits, self.action_splits, axis=1)], axis=1)
+        else:
+            actions = logits.argmax(axis=1)
+        return (actions[0] if single else actions), None
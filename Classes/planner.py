@@ -0,0 +1,189 @@
+from collections import OrderedDict
+import heapq
+import numpy as np
+from Classes import robot as r
+
+# Robot.ACTIONS inverted: (dx, dy) -> action
+STEP_ACTIONS = {step: action for action, step in r.Robot.ACTIONS.items()}
+
+# Above this many goal cells the heuristic uses the goals' bounding box instead of each cell
+MAX_HEURISTIC_GOALS = 32
+
+
+def astar(collision_map, start, goals):
+    """
+    Shortest sequence of Robot.ACTIONS moves from `start` to any cell in `goals`
+    over a collision map indexed [x, y] (4-connected, unit cost), as a tuple of
+    actions; () if start is a goal, None if no goal is reachable.
+    The heuristic is the Manhattan distance to the nearest goal (or to their
+    bounding box), which is consistent, so the first goal popped is optimal.
+    """
+    width, height = collision_map.shape
+    goals = [(x, y) for x, y in goals if 0 <= x < width and 0 <= y < height and not collision_map[x, y]]
+    if not goals:
+        return None
+    # Cells are flat indices x * height + y into the [x, y] map
+    walls = np.ascontiguousarray(collision_map).ravel()
+    goal_cells = {x * height + y for x, y in goals}
+    sx, sy = start
+    start_idx = sx * height + sy
+    if start_idx in goal_cells:
+        return ()
+
+    if len(goals) <= MAX_HEURISTIC_GOALS:
+        def heuristic(x, y):
+            return min(abs(x - gx) + abs(y - gy) for gx, gy in goals)
+    else:
+        xs, ys = zip(*goals)
+        x1, x2, y1, y2 = min(xs), max(xs), min(ys), max(ys)
+
+        def heuristic(x, y):
+            return max(x1 - x, 0, x - x2) + max(y1 - y, 0, y - y2)
+
+    # Neighbours as (flat offset, action), filtered by the bounds checks below
+    left, right, up, down = (STEP_ACTIONS[step] for step in ((-1, 0), (1, 0), (0, -1), (0, 1)))
+    costs = {start_idx: 0}
+    came_from = {start_idx: (-1, -1)}
+    # (f, -g, cell): among equal f, expand the deepest node first
+    heap = [(heuristic(sx, sy), 0, start_idx)]
+    while heap:
+        _, neg_cost, idx = heapq.heappop(heap)
+        cost = -neg_cost
+        if cost > costs[idx]:
+            continue  # stale entry
+        if idx in goal_cells:
+            actions = []
+            while idx != start_idx:
+                idx, action = came_from[idx]
+                actions.append(action)
+            return tuple(reversed(actions))
+
+        x, y = divmod(idx, height)
+        next_cost = cost + 1
+        for nx, ny, action in ((x - 1, y, left), (x + 1, y, right), (x, y - 1, up), (x, y + 1, down)):
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            nidx = nx * height + ny
+            if walls[nidx] or costs.get(nidx, next_cost + 1) <= next_cost:
+                continue
+            costs[nidx] = next_cost
+            came_from[nidx] = (idx, action)
+            heapq.heappush(heap, (next_cost + heuristic(nx, ny), -next_cost, nidx))
+    return None
+
+
+class PathPlanner:
+    """
+    A* over map.collision_map with an LRU cache of paths keyed by (start, goal
+    cells). Every cell along a computed path is cached too (a suffix of a
+    shortest path is a shortest path to the same goals), so following a path
+    costs one search. The cache is dropped whenever Map.set_blocked changes walls.
+    """
+
+    def __init__(self, map_obj, cache_size=65536):
+        self.map = map_obj
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # (start, goals) -> (actions, offset into actions), or None if unreachable
+        self.wall_version = map_obj.wall_version
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, start, goals):
+        if self.map.wall_version != self.wall_version:
+            self.cache.clear()
+            self.wall_version = self.map.wall_version
+
+        key = (start, goals)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return self.cache[key]
+
+        self.misses += 1
+        actions = astar(self.map.collision_map, start, goals)
+        if actions is None:
+            self.store(key, None)
+            return None
+        x, y = start
+        for offset, action in enumerate(actions):
+            self.store(((x, y), goals), (actions, offset))
+            dx, dy = r.Robot.ACTIONS[action]
+            x, y = x + dx, y + dy
+        self.store(((x, y), goals), (actions, len(actions)))
+        return self.cache[key]
+
+    def store(self, key, value):
+        cache = self.cache
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def path(self, start, goals):
+        """
+        Actions from start to the nearest cell of `goals` (a frozenset of (x, y)),
+        or None if unreachable.
+        """
+        entry = self.lookup(tuple(start), goals)
+        if entry is None:
+            return None
+        actions, offset = entry
+        return actions[offset:]
+
+    def next_action(self, start, goals):
+        """
+        First action of path(start, goals); None if already at a goal or unreachable.
+        """
+        entry = self.lookup(tuple(start), goals)
+        if entry is None:
+            return None
+        actions, offset = entry
+        return actions[offset] if offset < len(actions) else None
+
+
+class ExpertPolicy:
+    """
+    Scripted controller for WarehouseEnv: an empty robot heads for the nearest
+    station that has an item (any station if none has), a loaded one for the
+    nearest dropzone accepting its item. Other robots are ignored.
+    act() returns actions in the env's action format.
+    """
+
+    def __init__(self, env, planner=None):
+        self.env = env
+        self.planner = planner if planner is not None else PathPlanner(env.map)
+        self.station_cells = [tuple(pos) for pos in env.station_positions.tolist()]
+        self.all_stations = frozenset(self.station_cells)
+        self.dropzone_goals = {}
+
+    def dropzone_cells(self, item_type):
+        """
+        Cells of every dropzone accepting item_type, as a frozenset (built once per type).
+        """
+        goals = self.dropzone_goals.get(item_type)
+        if goals is None:
+            accepts = np.array([item_type in accepted for accepted in self.env.map.dropzone_accepts])
+            goals = frozenset(map(tuple, np.argwhere(accepts[self.env.map.dropzone_ids]).tolist()))
+            self.dropzone_goals[item_type] = goals
+        return goals
+
+    def goal(self, robot):
+        if robot.held_item_type is not None:
+            return self.dropzone_cells(robot.held_item_type)
+        present = frozenset(cell for cell, present in zip(self.station_cells, self.env.item_present) if present)
+        return present or self.all_stations
+
+    def robot_action(self, robot):
+        action = self.planner.next_action((robot.grid_x, robot.grid_y), self.goal(robot))
+        if action is None:
+            # At the goal waiting for a respawn, or stuck: step to any free neighbour
+            for action, (dx, dy) in r.Robot.ACTIONS.items():
+                if not self.env.map.is_blocked(robot.grid_x + dx, robot.grid_y + dy):
+                    return action
+            return 0
+        return action
+
+    def act(self):
+        if self.env.num_robots == 1:
+            return self.robot_action(self.env.robots[0])
+        return np.array([self.robot_action(robot) for robot in self.env.robots])
@@ -0,0 +1,124 @@
+import json
+import os
+from time import perf_counter_ns
+import numpy as np
+
+# Phases of WarehouseEnv.step, used as indices into the profiler tables
+MOVE, PICKUP, DELIVERY, RESPAWN, METRICS, OBSERVATION, RENDER, STEP = range(8)
+PHASES = ("move", "pickup", "delivery", "respawn", "metrics", "observation", "render", "step")
+
+# Histogram bucket b holds durations with ns.bit_length() == b, i.e. [2**(b-1), 2**b) ns
+NUM_BUCKETS = 64
+
+
+class StepProfiler:
+    """
+    Per-phase wall-clock profile of WarehouseEnv.step, using the monotonic
+    perf_counter_ns clock. Keeps a log2 histogram per phase aggregated over all
+    episodes, plus the most recent `trace_capacity` timed spans for trace export.
+    """
+
+    def __init__(self, trace_capacity=100_000):
+        self.counts = [0] * len(PHASES)
+        self.totals = [0] * len(PHASES)
+        self.maxima = [0] * len(PHASES)
+        self.histograms = [[0] * NUM_BUCKETS for _ in PHASES]
+        self.episodes = 0
+
+        # Ring buffer of spans: phase index, start ns, duration ns
+        self.trace_capacity = trace_capacity
+        self.trace = np.zeros((trace_capacity, 3), dtype=np.int64)
+        self.spans_recorded = 0
+
+    def add(self, phase, start, duration):
+        """
+        Records one span of `phase`.
+        """
+        self.counts[phase] += 1
+        self.totals[phase] += duration
+        if duration > self.maxima[phase]:
+            self.maxima[phase] = duration
+        self.histograms[phase][min(duration.bit_length(), NUM_BUCKETS - 1)] += 1
+        if self.trace_capacity:
+            self.trace[self.spans_recorded % self.trace_capacity] = (phase, start, duration)
+            self.spans_recorded += 1
+
+    def lap(self, phase, start):
+        """
+        Records `phase` as running from `start` until now; returns now so the
+        next phase can start there.
+        """
+        now = perf_counter_ns()
+        self.add(phase, start, now - start)
+        return now
+
+    def end_episode(self):
+        self.episodes += 1
+
+    def percentile(self, phase, q):
+        """
+        Approximate q-th percentile (0..100) in ns from the histogram: upper edge of the bucket.
+        """
+        histogram = self.histograms[phase]
+        target = self.counts[phase] * q / 100.0
+        seen = 0
+        for bucket, count in enumerate(histogram):
+            seen += count
+            if count and seen >= target:
+                return 2 ** bucket
+        return 0
+
+    def summary(self):
+        """
+        Per-phase stats: calls, total/mean/max and approximate p50/p99, in microseconds.
+        """
+        rows = {}
+        for phase, name in enumerate(PHASES):
+            count = self.counts[phase]
+            if not count:
+                continue
+            rows[name] = {
+                "calls": count,
+                "total_ms": self.totals[phase] / 1e6,
+                "mean_us": self.totals[phase] / count / 1e3,
+                "p50_us": self.percentile(phase, 50) / 1e3,
+                "p99_us": self.percentile(phase, 99) / 1e3,
+                "max_us": self.maxima[phase] / 1e3,
+            }
+        return rows
+
+    def summary_table(self):
+        """
+        Summary as a text table, phases sorted by total time.
+        """
+        rows = self.summary()
+        step_total = rows.get("step", {}).get("total_ms", 0.0)
+        lines = [
+            f"Step profile over {self.episodes} episodes (p50/p99 are log2-bucket upper bounds)",
+            f"{'phase':<12}{'calls':>10}{'total ms':>12}{'% step':>8}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'max us':>10}",
+        ]
+        for name, row in sorted(rows.items(), key=lambda item: -item[1]["total_ms"]):
+            share = 100.0 * row["total_ms"] / step_total if step_total else 0.0
+            lines.append(
+                f"{name:<12}{row['calls']:>10}{row['total_ms']:>12.2f}{share:>8.1f}{row['mean_us']:>10.2f}"
+                f"{row['p50_us']:>10.2f}{row['p99_us']:>10.2f}{row['max_us']:>10.2f}"
+            )
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path):
+        """
+        Writes the buffered spans in Chrome trace format (chrome://tracing, Perfetto,
+        speedscope). Phases nest inside their step, which renders as a flame chart.
+        """
+        count = min(self.spans_recorded, self.trace_capacity)
+        spans = self.trace[:count]
+        if self.spans_recorded > self.trace_capacity:
+            start = self.spans_recorded % self.trace_capacity
+            spans = np.concatenate([self.trace[start:], self.trace[:start]])
+        pid = os.getpid()
+        events = [
+            {"name": PHASES[phase], "ph": "X", "ts": start / 1e3, "dur": duration / 1e3, "pid": pid, "tid": 0}
+            for phase, start, duration in spans.tolist()
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ns"}, f)
@@ -0,0 +1,137 @@
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import numpy as np
+import pygame
+
+
+class EpisodeRecorder:
+    """
+    Writes rendered frames to a video or PNG sequence on a background thread.
+
+    `path` ending in a video extension (.mp4, .webm, ...) is encoded by an
+    ffmpeg subprocess; any other path is treated as a directory and filled with
+    frame_00000.png, frame_00001.png, ... The caller only pays for copying the
+    frame into one of `max_pending` preallocated slots; it blocks only when the
+    writer falls that many frames behind.
+    """
+    VIDEO_EXTENSIONS = {".mp4", ".mkv", ".webm", ".avi", ".mov"}
+
+    def __init__(self, path, fps=30, max_pending=64):
+        self.path = path
+        self.fps = fps
+        self.is_video = os.path.splitext(path)[1].lower() in self.VIDEO_EXTENSIONS
+        if self.is_video and shutil.which("ffmpeg") is None:
+            raise RuntimeError(f"Recording to {path} needs ffmpeg on PATH; pass a directory to write PNG frames instead.")
+
+        self.max_pending = max_pending
+        self.slots = None  # allocated on the first frame, once its shape is known
+        self.pixel_format = None
+        self.free_slots = queue.Queue()
+        self.pending = queue.Queue()
+        self.frames_written = 0
+        self.frames_added = 0
+        self.error = None
+        self.encoder = None
+        self.thread = None
+        self.closed = False
+
+    def add_frame(self, frame):
+        """
+        Queues a (height, width, 3) uint8 frame, e.g. the view returned by
+        env.render() in rgb_array mode. The frame is copied, so the caller may
+        overwrite it right away.
+        """
+        if self.closed:
+            raise RuntimeError("EpisodeRecorder is closed.")
+        if self.error is not None:
+            raise self.error
+        # Frames from env.render() are RGB views of an RGBX buffer; copying the
+        # padded pixels is one memcpy instead of a slow 3-byte strided copy
+        if frame.strides[1:] == (4, 1):
+            frame = np.lib.stride_tricks.as_strided(frame, shape=(*frame.shape[:2], 4), strides=frame.strides)
+        if self.slots is None:
+            self.start(frame.shape)
+
+        slot = self.free_slots.get()
+        np.copyto(self.slots[slot], frame)
+        self.pending.put(slot)
+        self.frames_added += 1
+
+    def start(self, shape):
+        """
+        Allocates the frame slots and starts the writer thread (and encoder).
+        """
+        self.slots = np.empty((self.max_pending, *shape), dtype=np.uint8)
+        for slot in range(self.max_pending):
+            self.free_slots.put(slot)
+
+        height, width, channels = shape
+        self.pixel_format = "RGBX" if channels == 4 else "RGB"
+        if self.is_video:
+            self.encoder = subprocess.Popen(
+                [
+                    "ffmpeg", "-y", "-loglevel", "error",
+                    "-f", "rawvideo", "-pix_fmt", "rgb0" if channels == 4 else "rgb24", "-s", f"{width}x{height}", "-r", str(self.fps),
+                    "-i", "-",
+                    # yuv420p needs even dimensions
+                    "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p",
+                    self.path,
+                ],
+                stdin=subprocess.PIPE
+            )
+        else:
+            os.makedirs(self.path, exist_ok=True)
+
+        self.thread = threading.Thread(target=self.write_frames, name="EpisodeRecorder", daemon=True)
+        self.thread.start()
+
+    def write_frames(self):
+        """
+        Writer thread: drains queued slots until the None sentinel.
+        """
+        while True:
+            slot = self.pending.get()
+            if slot is None:
+                break
+            try:
+                if self.error is None:
+                    self.write_frame(self.slots[slot])
+                    self.frames_written += 1
+            except Exception as error:
+                self.error = error
+            finally:
+                self.free_slots.put(slot)
+
+    def write_frame(self, frame):
+        if self.encoder is not None:
+            self.encoder.stdin.write(frame.data)
+        else:
+            height, width = frame.shape[:2]
+            surface = pygame.image.frombuffer(frame, (width, height), self.pixel_format)
+            pygame.image.save(surface, os.path.join(self.path, f"frame_{self.frames_written:05d}.png"))
+
+    def close(self):
+        """
+        Waits until every queued frame is written and finalizes the output.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if self.thread is not None:
+            self.pending.put(None)
+            self.thread.join()
+        if self.encoder is not None:
+            self.encoder.stdin.close()
+            if self.encoder.wait() != 0 and self.error is None:
+                self.error = RuntimeError(f"ffmpeg failed while writing {self.path}")
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,270 @@
+from collections import deque
+import heapq
+from Classes import distance_field as df
+from Classes import robot as r
+
+# Outcome of a robot's move in resolve_moves
+MOVED, WALL, ROBOT = range(3)
+
+# Robot.ACTIONS steps, plus waiting in place for planners that allow it
+WAIT = (0, 0)
+
+
+def resolve_moves(positions, targets, is_blocked):
+    """
+    Simultaneous moves: every robot goes from positions[i] to targets[i] at
+    once, unless that hits a wall or conflicts with another robot, in which
+    case it stays. Conflicts are two robots ending on the same cell, two robots
+    swapping cells, and moving onto a robot that stays; following a robot
+    that moves away (and rotating in a cycle of three or more) is allowed.
+    The rules are symmetric, so the result does not depend on robot order.
+
+    positions and targets are lists of (x, y). Returns (final cells, outcome
+    per robot: MOVED, WALL or ROBOT). Every robot is reverted at most once, so
+    the cost is linear in the number of robots.
+    """
+    final = [position if target == position or is_blocked(*target) else target
+             for position, target in zip(positions, targets)]
+    outcomes = [WALL if target != position and cell == position else MOVED
+                for position, target, cell in zip(positions, targets, final)]
+
+    # Reservation table for the next step: robots claiming each cell
+    claims = {}
+    for idx, cell in enumerate(final):
+        claims.setdefault(cell, []).append(idx)
+    occupant = {position: idx for idx, position in enumerate(positions)}
+
+    conflicted = [idx for robots in claims.values() if len(robots) > 1 for idx in robots]
+    for idx, cell in enumerate(final):
+        other = occupant.get(cell)
+        if other is not None and other != idx and final[other] == positions[idx]:
+            conflicted.append(idx)  # swap; the other robot is appended at its own turn
+
+    # A robot that has to stay claims its own cell, which may push back robots moving onto it
+    while conflicted:
+        idx = conflicted.pop()
+        position = positions[idx]
+        if final[idx] == position:
+            continue
+        claims[final[idx]].remove(idx)
+        final[idx] = position
+        outcomes[idx] = ROBOT
+        robots = claims.setdefault(position, [])
+        robots.append(idx)
+        if len(robots) > 1:
+            conflicted.extend(other for other in robots if other != idx)
+    return final, outcomes
+
+
+class ReservationTable:
+    """
+    Space-time reservations of map cells for prioritized planning: cells per
+    time step, moves between time steps (to forbid swaps), and cells held by
+    a robot from some time on (parked at its goal).
+    """
+    __slots__ = ("vertices", "edges", "parked", "last_reserved")
+
+    def __init__(self):
+        self.vertices = {}  # (cell, t) -> robot
+        self.edges = {}  # (from cell, to cell, t) -> robot moving between t and t + 1
+        self.parked = {}  # cell -> (from t, robot)
+        self.last_reserved = {}  # cell -> last t with a vertex reservation
+
+    def clear(self):
+        self.vertices.clear()
+        self.edges.clear()
+        self.parked.clear()
+        self.last_reserved.clear()
+
+    def copy(self):
+        table = ReservationTable()
+        table.restore(self)
+        return table
+
+    def restore(self, other):
+        """
+        Replaces all reservations with a copy of those in `other`.
+        """
+        for name in self.__slots__:
+            reservations = getattr(self, name)
+            reservations.clear()
+            reservations.update(getattr(other, name))
+
+    def owner(self, cell, t):
+        """
+        Robot holding `cell` at time t, or None.
+        """
+        robot = self.vertices.get((cell, t))
+        if robot is not None:
+            return robot
+        parked = self.parked.get(cell)
+        if parked is not None and t >= parked[0]:
+            return parked[1]
+        return None
+
+    def is_free(self, cell, t, robot):
+        owner = self.owner(cell, t)
+        return owner is None or owner == robot
+
+    def move_free(self, src, dst, t, robot):
+        """
+        Whether `robot` may move from src at t to dst at t + 1: dst is free then
+        and no other robot moves dst -> src over the same step (a swap).
+        """
+        return self.is_free(dst, t + 1, robot) and self.edges.get((dst, src, t), robot) == robot
+
+    def can_park(self, cell, t, robot):
+        """
+        Whether `robot` may stay on `cell` from t on (nobody else needs it later).
+        """
+        return self.is_free(cell, t, robot) and self.last_reserved.get(cell, -1) <= t
+
+    def reserve_path(self, cells, start_time, robot, park=True):
+        """
+        Reserves one cell per time step from start_time, the moves between
+        them and, with park=True, the last cell from then on.
+        """
+        for step, cell in enumerate(cells):
+            t = start_time + step
+            self.vertices[(cell, t)] = robot
+            if self.last_reserved.get(cell, -1) < t:
+                self.last_reserved[cell] = t
+            if step:
+                self.edges[(cells[step - 1], cell, t - 1)] = robot
+        if park:
+            self.parked[cells[-1]] = (start_time + len(cells) - 1, robot)
+
+    def release_path(self, cells, start_time, robot):
+        """
+        Drops what reserve_path() reserved for `robot` along `cells`. last_reserved
+        keeps its times, so parking on those cells stays refused a little longer
+        than needed, never allowed too early.
+        """
+        for step, cell in enumerate(cells):
+            t = start_time + step
+            if self.vertices.get((cell, t)) == robot:
+                del self.vertices[(cell, t)]
+            if step and self.edges.get((cells[step - 1], cell, t - 1)) == robot:
+                del self.edges[(cells[step - 1], cell, t - 1)]
+        parked = self.parked.get(cells[-1])
+        if parked is not None and parked[1] == robot:
+            del self.parked[cells[-1]]
+
+
+def plan_path(collision_map, table, start, goals, robot, start_time=0, horizon=None, allow_wait=True, field=None):
+    """
+    Space-time A* for one robot around the reservations in `table`: the
+    cells (one per time step from start_time) to a goal cell where it can
+    park, or None within `horizon` steps. The static BFS distance to the goals
+    (`field`, a distance_field.DistanceField, built if not given) is the
+    heuristic. Without allow_wait robots can only move, as in WarehouseEnv.
+    """
+    width, height = collision_map.shape
+    if field is None:
+        field = df.DistanceField(collision_map, goals)
+    distances = field.distances
+    sx, sy = start
+    if distances[sx, sy] == df.UNREACHABLE:
+        return None
+    if horizon is None:
+        horizon = int(distances[sx, sy]) + 2 * (width + height)
+    steps = list(r.Robot.ACTIONS.values()) + ([WAIT] if allow_wait else [])
+
+    # In the time-expanded graph the cost of (x, y, t) is t - start_time whatever the
+    # route, so the first time a state is generated is as good as any later one
+    came_from = {(sx, sy, start_time): None}
+    heap = [(int(distances[sx, sy]), -start_time, sx, sy)]
+    while heap:
+        _, neg_t, x, y = heapq.heappop(heap)
+        t = -neg_t
+        if distances[x, y] == 0 and table.can_park((x, y), t, robot):
+            cells = []
+            state = (x, y, t)
+            while state is not None:
+                cells.append(state[:2])
+                state = came_from[state]
+            return cells[::-1]
+        if t - start_time >= horizon:
+            continue
+
+        for dx, dy in steps:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height) or distances[nx, ny] == df.UNREACHABLE:
+                continue  # walls are unreachable too
+            state = (nx, ny, t + 1)
+            if state in came_from or not table.move_free((x, y), (nx, ny), t, robot):
+                continue
+            came_from[state] = (x, y, t)
+            heapq.heappush(heap, (t + 1 - start_time + int(distances[nx, ny]), -(t + 1), nx, ny))
+    return None
+
+
+def plan_fleet(map_obj, starts, goals, order=None, allow_wait=True, horizon=None, table=None):
+    """
+    Prioritized multi-robot planning over map_obj.collision_map: robots are
+    planned one at a time (by default the farthest from its goal first), each
+    with space-time A* around the paths reserved before it. A robot that
+    finds no path stays parked on its start, so the fleet is planned at most
+    twice: once plainly and, if anyone failed, once more with those robots
+    held on their start from t=0. Robots failing in that second pass are
+    parked in place and only the robots already routed over their start are
+    replanned. The resulting paths (with the parked robots standing still)
+    have no shared cells and no swaps. `goals[i]` is one (x, y) or a
+    collection of cells. Returns one list of cells per robot (None if a
+    robot found no path).
+    """
+    collision_map = map_obj.collision_map
+    table = table if table is not None else ReservationTable()
+    goal_sets = [frozenset([tuple(goal)]) if len(goal) == 2 and not hasattr(goal[0], "__len__")
+                 else frozenset(map(tuple, goal)) for goal in goals]
+    fields = {}
+    for goal_set in goal_sets:
+        if goal_set not in fields:
+            fields[goal_set] = df.DistanceField(collision_map, goal_set)
+
+    starts = [tuple(start) for start in starts]
+    if order is None:
+        order = sorted(range(len(starts)), key=lambda idx: -int(fields[goal_sets[idx]][starts[idx]]))
+
+    def plan_pass(stuck, repair):
+        # Nobody may enter another robot's start cell at time 0, nor a stuck robot's ever
+        for robot, start in enumerate(starts):
+            table.reserve_path([start], 0, robot, park=robot in stuck)
+        paths = [None] * len(starts)
+        failed = []
+        pending = deque(robot for robot in order if robot not in stuck)
+        while pending:
+            robot = pending.popleft()
+            start = starts[robot]
+            path = plan_path(collision_map, table, start, goal_sets[robot], robot, horizon=horizon,
+                             allow_wait=allow_wait, field=fields[goal_sets[robot]])
+            paths[robot] = path
+            if path is not None:
+                table.reserve_path(path, 0, robot)
+                continue
+            failed.append(robot)
+            if repair:
+                # Park it for good and requeue just the robots whose paths cross its start
+                table.reserve_path([start], 0, robot)
+                for other, other_path in enumerate(paths):
+                    if other_path is not None and start in other_path:
+                        table.release_path(other_path, 0, other)
+                        table.reserve_path([starts[other]], 0, other, park=False)
+                        paths[other] = None
+                        pending.append(other)
+        return paths, failed
+
+    initial = table.copy()
+    paths, failed = plan_pass(frozenset(), repair=False)
+    if failed:
+        table.restore(initial)
+        paths, _ = plan_pass(frozenset(failed), repair=True)
+    return paths
+
+
+def path_actions(cells):
+    """
+    Robot.ACTIONS for a list of cells; None where the robot waits.
+    """
+    step_actions = {step: action for action, step in r.Robot.ACTIONS.items()}
+    return [step_actions.get((x2 - x1, y2 - y1)) for (x1, y1), (x2, y2) in zip(cells, cells[1:])]
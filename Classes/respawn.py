@@ -0,0 +1,70 @@
+import heapq
+import numpy as np
+
+# Respawn delay distributions; each draws an integer delay >= 1 with the station's delay as mean
+DISTRIBUTIONS = ("fixed", "geometric", "poisson", "uniform")
+
+
+class RespawnScheduler:
+    """
+    Event heap of pending item respawns, keyed on the absolute step at which
+    each pickup station gets its item back. Scheduling is O(log n) and a step
+    without a due respawn costs one comparison against the heap top, however
+    many item types and stations there are.
+
+    `delays` is the mean delay per station (an int applies to all of them);
+    `distribution` picks how each actual delay is drawn around it.
+    """
+    __slots__ = ("delays", "distribution", "heap", "sequence")
+
+    def __init__(self, num_stations, delays=10, distribution="fixed"):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown respawn distribution {distribution!r}, expected one of {DISTRIBUTIONS}")
+        self.delays = np.broadcast_to(np.asarray(delays, dtype=np.int64), (num_stations,)).copy()
+        if num_stations and self.delays.min() < 1:
+            raise ValueError("Respawn delays must be at least 1 step")
+        self.distribution = distribution
+        self.heap = []
+        # Tie-breaker so stations due on the same step respawn in scheduling order
+        self.sequence = 0
+
+    def clear(self):
+        self.heap.clear()
+        self.sequence = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def draw_delay(self, station, rng):
+        """
+        Delay in steps (>= 1) for one respawn of `station`.
+        """
+        mean = int(self.delays[station])
+        if self.distribution == "fixed":
+            return mean
+        if self.distribution == "geometric":
+            return int(rng.geometric(1.0 / mean))
+        if self.distribution == "poisson":
+            return 1 + int(rng.poisson(mean - 1))
+        return int(rng.integers(1, 2 * mean))  # uniform on [1, 2 * mean - 1]
+
+    def schedule(self, station, step, rng=None):
+        """
+        Schedules the item of `station`, taken at `step`, to come back. The pickup
+        step counts as the first step of the delay, so a delay of 1 respawns at
+        the end of the same step. Returns the due step.
+        """
+        due = step + self.draw_delay(station, rng) - 1
+        heapq.heappush(self.heap, (due, self.sequence, station))
+        self.sequence += 1
+        return due
+
+    def pop_due(self, step):
+        """
+        Removes and returns the stations whose respawn is due at or before `step`.
+        """
+        heap = self.heap
+        due = []
+        while heap and heap[0][0] <= step:
+            due.append(heapq.heappop(heap)[2])
+        return due
@@ -1,7 +1,11 @@
 import pygame
-from Classes.Helper.helper import get_frame
+from Classes.Helper.helper import load_atlas, load_frame, reset_event_flags
 
 class Robot(pygame.sprite.Sprite):
+    """
+    Render view of a robot. The game logic lives in RobotState; the sprite
+    is only built when rendering and follows the state through sync().
+    """
 
     ACTIONS = {
         0: (-1, 0), # move left
@@ -10,6 +14,11 @@ class Robot(pygame.sprite.Sprite):
         3:  (0, 1), # move down
     }
 
+    SHEET_PATH = 'Assets/images/Drone_2_Flying_32x32.png'
+    # Animation timing in simulation steps, so replays render identically
+    FLY_FRAME_STEPS = 1 / 0.15  # steps per fly frame
+    GRAB_STEPS = 12  # one claw frame per step
+
     def __init__(self, bot_id, grid_pos, groups, grid_size, tile_size):
         super().__init__(groups)
 
@@ -18,18 +27,13 @@ class Robot(pygame.sprite.Sprite):
         self.grid_size = grid_size
         self.tile_size = tile_size
 
-        # Load sprite sheet & animations
-        self.sprite_sheet = pygame.image.load('Assets/images/Drone_2_Flying_32x32.png').convert_alpha()
-        self.fly_frames = [get_frame(self, i, width=32, height=44, rh=0) for i in range(20, 23)]
-        self.grab_frames = [get_frame(self, i, width=32, height=44, rh=228) for i in range(12)]
-        self.frame_index = 0
-        self.animation_speed = 0.15
-        self.is_grabbing = False
-        self.grab_timer = 0
-        self.grab_duration = 500  # milliseconds
+        # Animation atlas cut from the sprite sheet (shared per process through the helper cache)
+        self.fly_frames, self.grab_composites = load_atlas(self.SHEET_PATH, self.build_atlas)
+        self.step = 0
+        self.grab_start_step = None
 
         # Initial sprite image and hitbox
-        self.image = self.fly_frames[self.frame_index]
+        self.image = self.fly_frames[0]
         pixel_pos = (self.grid_x * self.tile_size, self.grid_y * self.tile_size)
         self.hitbox = pygame.Rect(pixel_pos[0], pixel_pos[1], 32, 32)
         self.rect = self.image.get_rect(center=self.hitbox.topleft)
@@ -38,8 +42,100 @@ class Robot(pygame.sprite.Sprite):
         self.bot_id = bot_id
         # Movement speed of bot
         self.speed = self.tile_size
+
+    @classmethod
+    def build_atlas(cls):
+        """
+        Cuts the fly loop and claw frames from the sheet and pre-composites every
+        fly x grab combination: grab_composites[fly_index][grab_index] is a 32x72
+        frame with the top of the fly frame above the claw.
+        """
+        fly_frames = [load_frame(cls.SHEET_PATH, i, width=32, height=44, rh=0) for i in range(20, 23)]
+        grab_frames = [load_frame(cls.SHEET_PATH, i, width=32, height=44, rh=228) for i in range(12)]
+        grab_composites = []
+        for base_frame in fly_frames:
+            row = []
+            for grab_frame in grab_frames:
+                full_frame = pygame.Surface((32, 72), pygame.SRCALPHA)
+                # Only copy top 34 px from fly frame
+                full_frame.blit(base_frame, (0, 0), (0, 0, 32, 34))
+                # Then copy the full grab claw frame below it
+                full_frame.blit(grab_frame, (0, 34))
+                row.append(full_frame)
+            grab_composites.append(row)
+        return fly_frames, grab_composites
+
+    def set_position(self, x, y):
+        """
+        Moves the sprite to a grid position.
+        """
+        self.grid_x = x
+        self.grid_y = y
+        # Update pixel position for rendering
+        self.hitbox.topleft = (self.grid_x * self.tile_size, self.grid_y * self.tile_size)
+
+    def sync(self, state, step=None):
+        """
+        Mirrors a RobotState at simulation step `step`: position, and a grab
+        animation on pickup/delivery. Without a step the animation advances by one.
+        """
+        self.step = self.step + 1 if step is None else step
+        self.set_position(state.grid_x, state.grid_y)
+        if state.just_picked_up or state.just_delivered:
+            self.start_grab()
+
+    def start_grab(self):
+        """
+        Trigger grab animation.
+        """
+        self.grab_start_step = self.step
+
+    def animate(self):
+        """
+        Picks the atlas frame for the current step: fly loop, with the claw
+        composite while grabbing. No surfaces are created here.
+        """
+        fly_index = int(self.step / self.FLY_FRAME_STEPS) % len(self.fly_frames)
+
+        if self.grab_start_step is not None:
+            grab_index = self.step - self.grab_start_step
+            if 0 <= grab_index < self.GRAB_STEPS:
+                self.image = self.grab_composites[fly_index][grab_index * len(self.grab_composites[0]) // self.GRAB_STEPS]
+                return
+            self.grab_start_step = None
+
+        # Not grabbing → fly frame only
+        self.image = self.fly_frames[fly_index]
+
+    def update(self):
+        self.animate()
+
+
+class RobotState:
+    """
+    Logic-only robot: grid position, inventory and last-step event flags.
+    Holds no pygame objects, so it is cheap to create on every reset.
+    """
+    __slots__ = (
+        "bot_id", "grid_x", "grid_y", "held_item_type",
+        "collided_with_wall", "collided_with_robot",
+        "just_picked_up", "just_tried_wrong_pickup",
+        "just_delivered", "just_tried_wrong_drop",
+    )
+    # Last-step event flags, in the bit order used by event_bits()
+    EVENT_FLAGS = (
+        "collided_with_wall", "collided_with_robot",
+        "just_picked_up", "just_tried_wrong_pickup",
+        "just_delivered", "just_tried_wrong_drop",
+    )
+
+    def __init__(self, bot_id, grid_pos):
+        # Unique identifier for each bot on the map
+        self.bot_id = bot_id
+        self.grid_x, self.grid_y = grid_pos
         # Represents inventory; None = empty, "A" = ItemA, "B" = ItemB
         self.held_item_type = None
+        reset_event_flags(self)
 
     def propose_move(self, action):
         """
@@ -56,78 +152,47 @@ class Robot(pygame.sprite.Sprite):
         """
         self.grid_x = x
         self.grid_y = y
-        # Update pixel position for rendering
-        self.hitbox.topleft = (self.grid_x * self.tile_size, self.grid_y * self.tile_size)
 
-    def pickup_item(self, item):
+    def event_bits(self):
         """
-        Sets the inventory flag for the picked-up item to True if empty.
+        Event flags packed into an int, bit i = EVENT_FLAGS[i].
         """
-        if self.held_item_type is None:
-            self.held_item_type = item.item_type
-            print(f"({self.bot_id})Picked up item {item.item_type}.")
-
-            # Trigger grab animation
-            self.is_grabbing = True
-            self.grab_timer = pygame.time.get_ticks()
-            self.frame_index = 0
-        else:
-            print(f"({self.bot_id})Already holding item {self.held_item_type}.")
+        bits = 0
+        for bit, name in enumerate(self.EVENT_FLAGS):
+            if getattr(self, name):
+                bits |= 1 << bit
+        return bits
 
-    def deliver_item(self, dropzone):
+    def set_event_bits(self, bits):
+        """
+        Restores the event flags from event_bits().
+        """
+        for bit, name in enumerate(self.EVENT_FLAGS):
+            setattr(self, name, bool(bits & (1 << bit)))
 
-        print("delivering item works")
+    def pickup_item(self, item_type):
+        """
+        Sets the inventory to the picked-up item type if empty.
+        """
+        if self.held_item_type is None:
+            self.held_item_type = item_type
+            self.just_picked_up = True
+        else:
+            self.just_tried_wrong_pickup = True
 
+    def deliver_item(self, accepted_types):
+        """
+        Empties the inventory if the held item is among the types accepted on
+        the robot's cell (see Map.accepted_types_at).
+        Outcomes are reported through the event flags, see metrics.EpisodeMetrics.
+        """
         if self.held_item_type is None:
-            print(f"({self.bot_id})No item to deliver.")
             return False
 
-        if self.held_item_type == dropzone.accepted_type:
-            print(f"({self.bot_id})Delivered item {self.held_item_type}.")
+        if self.held_item_type in accepted_types:
             self.held_item_type = None
-
-            # Trigger grab animation
-            self.is_grabbing = True
-            self.grab_timer = pygame.time.get_ticks()
-            self.frame_index = 0
+            self.just_delivered = True
             return True
         else:
-            print(f"({self.bot_id})Wrong item for this dropzone.")
+            self.just_tried_wrong_drop = True
             return False
-
-    def animate(self):
-        """
-        Handles flying loop and grab overlay.
-        """
-        current_time = pygame.time.get_ticks()
-
-        # Base fly animation
-        self.frame_index += self.animation_speed
-        if self.frame_index >= len(self.fly_frames):
-            self.frame_index = 0
-        base_frame = self.fly_frames[int(self.frame_index)]
-
-        # If grabbing, composite bottom claw
-        if self.is_grabbing:
-            elapsed = current_time - self.grab_timer
-            grab_frame_index = min(int((elapsed / self.grab_duration) * len(self.grab_frames)), len(self.grab_frames) - 1)
-            grab_frame = self.grab_frames[grab_frame_index]
-            # Create a full composite image
-            full_frame = pygame.Surface((32, 72), pygame.SRCALPHA)
-            # Only copy top 20 px from fly frame
-            full_frame.blit(base_frame, (0, 0), (0, 0, 32, 34))
-            # Then copy full grab claw (32x12) at y = 20
-            full_frame.blit(grab_frame, (0, 34))
-
-            self.image = full_frame
-
-            if elapsed >= self.grab_duration:
-                self.is_grabbing = False
-                self.frame_index = 0
-            return
-
-        # Not grabbing → fly frame only
-        self.image = base_frame
-
-    def update(self):
-        self.animate()
\ No newline at end of file
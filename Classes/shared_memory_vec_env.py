@@ -0,0 +1,230 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+import pygame
+from stable_baselines3.common.env_util import is_wrapped
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+from Classes import map as m
+from Classes import warehouse_env as whe
+
+
+def _attach_buffers(shm_blocks, num_envs, obs_shape, obs_dtype):
+    """
+    Wraps the shared memory blocks as NumPy arrays (no copies).
+    """
+    return {
+        "obs": np.ndarray((num_envs, *obs_shape), dtype=obs_dtype, buffer=shm_blocks["obs"].buf),
+        "terminal_obs": np.ndarray((num_envs, *obs_shape), dtype=obs_dtype, buffer=shm_blocks["terminal_obs"].buf),
+        "rewards": np.ndarray((num_envs,), dtype=np.float32, buffer=shm_blocks["rewards"].buf),
+        "dones": np.ndarray((num_envs,), dtype=bool, buffer=shm_blocks["dones"].buf),
+        "truncated": np.ndarray((num_envs,), dtype=bool, buffer=shm_blocks["truncated"].buf),
+        "actions": np.ndarray((num_envs,), dtype=np.int64, buffer=shm_blocks["actions"].buf),
+    }
+
+
+def _worker(remote, parent_remote, shm_names, num_envs, obs_shape, obs_dtype, start, map_kwargs, env_kwargs, envs_per_worker):
+    """
+    Worker process: builds its Map from the TMX once, owns `envs_per_worker`
+    WarehouseEnv instances and writes their results into the shared buffers.
+    Only short commands travel through the pipe.
+    """
+    parent_remote.close()
+    shm_blocks = {name: shared_memory.SharedMemory(name=shm_name) for name, shm_name in shm_names.items()}
+    buffers = _attach_buffers(shm_blocks, num_envs, obs_shape, obs_dtype)
+    own = slice(start, start + envs_per_worker)
+    obs, terminal_obs = buffers["obs"][own], buffers["terminal_obs"][own]
+    rewards, dones, truncated, actions = (buffers[k][own] for k in ("rewards", "dones", "truncated", "actions"))
+
+    game_map = m.Map(
+        all_sprites_group=pygame.sprite.Group(),
+        render_layer_group=pygame.sprite.Group(),
+        **map_kwargs
+    )
+    envs = [whe.WarehouseEnv(map_obj=game_map, **env_kwargs) for _ in range(envs_per_worker)]
+
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                # Infos only travel through the pipe for finished episodes that have any
+                finished_infos = None
+                for idx, env in enumerate(envs):
+                    ob, reward, terminated, trunc, info = env.step(actions[idx])
+                    done = terminated or trunc
+                    if done:
+                        terminal_obs[idx] = ob
+                        ob, _ = env.reset()
+                        if info:
+                            finished_infos = finished_infos or {}
+                            finished_infos[idx] = info
+                    obs[idx] = ob
+                    rewards[idx] = reward
+                    dones[idx] = done
+                    truncated[idx] = trunc and not terminated
+                remote.send(finished_infos)
+            elif cmd == "reset":
+                for idx, env in enumerate(envs):
+                    obs[idx], _ = env.reset(seed=data[idx])
+                remote.send(None)
+            elif cmd == "get_attr":
+                name, indices = data
+                remote.send([getattr(envs[i], name) for i in indices])
+            elif cmd == "set_attr":
+                name, value, indices = data
+                for i in indices:
+                    setattr(envs[i], name, value)
+                remote.send(None)
+            elif cmd == "env_method":
+                name, args, kwargs, indices = data
+                remote.send([getattr(envs[i], name)(*args, **kwargs) for i in indices])
+            elif cmd == "is_wrapped":
+                wrapper_class, indices = data
+                remote.send([is_wrapped(envs[i], wrapper_class) for i in indices])
+            elif cmd == "close":
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for env in envs:
+            env.close()
+        for shm in shm_blocks.values():
+            shm.close()
+        remote.close()
+
+
+class SharedMemoryVecEnv(VecEnv):
+    """
+    SB3 VecEnv running WarehouseEnv instances in worker processes.
+    Observations, rewards and dones are exchanged through shared memory;
+    the pipes only carry a one-word command and acknowledgement per step,
+    plus the infos (e.g. episode_metrics) of episodes that just finished.
+    """
+
+    def __init__(self, map_kwargs, env_kwargs, num_workers, envs_per_worker=1, start_method=None):
+        num_envs = num_workers * envs_per_worker
+        self.num_workers = num_workers
+        self.envs_per_worker = envs_per_worker
+
+        # Spaces are read from a local env; building one needs no display or images
+        probe_map = m.Map(
+            all_sprites_group=pygame.sprite.Group(),
+            render_layer_group=pygame.sprite.Group(),
+            **map_kwargs
+        )
+        probe_env = whe.WarehouseEnv(map_obj=probe_map, **env_kwargs)
+        observation_space, action_space = probe_env.observation_space, probe_env.action_space
+        obs_shape, obs_dtype = observation_space.shape, observation_space.dtype
+        obs_bytes = int(np.prod(obs_shape)) * obs_dtype.itemsize
+
+        # Allocate shared buffers
+        sizes = {
+            "obs": num_envs * obs_bytes,
+            "terminal_obs": num_envs * obs_bytes,
+            "rewards": num_envs * 4,
+            "dones": num_envs,
+            "truncated": num_envs,
+            "actions": num_envs * 8,
+        }
+        self.shm_blocks = {name: shared_memory.SharedMemory(create=True, size=size) for name, size in sizes.items()}
+        self.buffers = _attach_buffers(self.shm_blocks, num_envs, obs_shape, obs_dtype)
+        shm_names = {name: shm.name for name, shm in self.shm_blocks.items()}
+
+        # Same default as SB3's SubprocVecEnv: forkserver is safe with threads and fast to start
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+
+        self.remotes, self.processes = [], []
+        for worker_idx in range(num_workers):
+            remote, work_remote = ctx.Pipe()
+            args = (work_remote, remote, shm_names, num_envs, obs_shape, obs_dtype, worker_idx * envs_per_worker,
+                    map_kwargs, env_kwargs, envs_per_worker)
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            work_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+
+        self.waiting = False
+        self.closed = False
+        super().__init__(num_envs, observation_space, action_space)
+
+    def _split_indices(self, indices):
+        """
+        Groups global env indices by worker: {worker_idx: [local indices]}.
+        """
+        grouped = {}
+        for idx in self._get_indices(indices):
+            grouped.setdefault(idx // self.envs_per_worker, []).append(idx % self.envs_per_worker)
+        return grouped
+
+    def reset(self):
+        for worker_idx, remote in enumerate(self.remotes):
+            start = worker_idx * self.envs_per_worker
+            remote.send(("reset", self._seeds[start:start + self.envs_per_worker]))
+        for remote in self.remotes:
+            remote.recv()
+        self._reset_seeds()
+        self._reset_options()
+        return self.buffers["obs"].copy()
+
+    def step_async(self, actions):
+        self.buffers["actions"][:] = actions
+        for remote in self.remotes:
+            remote.send(("step", None))
+        self.waiting = True
+
+    def step_wait(self):
+        infos = [{} for _ in range(self.num_envs)]
+        for worker_idx, remote in enumerate(self.remotes):
+            finished_infos = remote.recv()
+            if finished_infos:
+                for idx, info in finished_infos.items():
+                    infos[worker_idx * self.envs_per_worker + idx].update(info)
+        self.waiting = False
+
+        dones = self.buffers["dones"].copy()
+        for idx in np.flatnonzero(dones):
+            infos[idx]["terminal_observation"] = self.buffers["terminal_obs"][idx].copy()
+            infos[idx]["TimeLimit.truncated"] = bool(self.buffers["truncated"][idx])
+        return self.buffers["obs"].copy(), self.buffers["rewards"].copy(), dones, infos
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        for shm in self.shm_blocks.values():
+            shm.close()
+            shm.unlink()
+        self.closed = True
+
+    def get_attr(self, attr_name, indices=None):
+        grouped = self._split_indices(indices)
+        for worker_idx, local in grouped.items():
+            self.remotes[worker_idx].send(("get_attr", (attr_name, local)))
+        return [value for worker_idx in grouped for value in self.remotes[worker_idx].recv()]
+
+    def set_attr(self, attr_name, value, indices=None):
+        grouped = self._split_indices(indices)
+        for worker_idx, local in grouped.items():
+            self.remotes[worker_idx].send(("set_attr", (attr_name, value, local)))
+        for worker_idx in grouped:
+            self.remotes[worker_idx].recv()
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        grouped = self._split_indices(indices)
+        for worker_idx, local in grouped.items():
+            self.remotes[worker_idx].send(("env_method", (method_name, method_args, method_kwargs, local)))
+        return [value for worker_idx in grouped for value in self.remotes[worker_idx].recv()]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        grouped = self._split_indices(indices)
+        for worker_idx, local in grouped.items():
+            self.remotes[worker_idx].send(("is_wrapped", (wrapper_class, local)))
+        return [value for worker_idx in grouped for value in self.remotes[worker_idx].recv()]
@@ -0,0 +1,275 @@
+import json
+import os
+import numpy as np
+
+INDEX_FILE = "index.json"
+
+
+def chunk_dir(directory, chunk_idx):
+    return os.path.join(directory, f"chunk_{chunk_idx:05d}")
+
+
+class TrajectoryRecorder:
+    """
+    Records WarehouseEnv episodes as columnar .npy files, one directory per
+    chunk of `chunk_size` rows, so memory stays bounded while recording and
+    readers can memory-map any chunk.
+
+    Each row is one state: the reset of an episode (step 0, action -1) or the
+    result of one step (the action taken, its reward and termination flags, the
+    new observation, robot positions, held items, event flags and the items
+    present at every pickup station). Transitions are consecutive rows of the
+    same episode, so observations are stored once.
+    """
+
+    def __init__(self, directory, env, chunk_size=65536):
+        self.directory = directory
+        self.env = env
+        self.chunk_size = chunk_size
+        os.makedirs(directory, exist_ok=True)
+
+        num_robots = env.num_robots
+        robots = (num_robots,) if num_robots > 1 else ()
+        self.columns = {
+            "episode": ((), np.int32),
+            "step": ((), np.int32),
+            "obs": (env.observation_space.shape, env.observation_space.dtype),
+            "action": (robots, np.int64),
+            "reward": (robots, np.float32),
+            "terminated": ((), bool),
+            "truncated": ((), bool),
+            "robot_x": ((num_robots,), np.int16),
+            "robot_y": ((num_robots,), np.int16),
+            "held": ((num_robots,), np.int16),  # index into pickup_item_types, -1 = empty
+            "flags": ((num_robots,), np.uint8),  # RobotState.event_bits()
+            "item_present": ((len(env.station_types),), bool),
+        }
+        # One preallocated chunk buffer per column, reused after every flush
+        self.buffers = {
+            name: np.zeros((chunk_size, *shape), dtype=dtype) for name, (shape, dtype) in self.columns.items()
+        }
+        self.type_index = {item_type: idx for idx, item_type in enumerate(env.pickup_item_types)}
+
+        self.rows = 0  # rows in the current chunk buffer
+        self.chunk_rows = []  # rows of every flushed chunk
+        self.episodes = []  # [first global row, number of rows, reset seed] per episode
+        self.closed = False
+
+    @property
+    def total_rows(self):
+        return sum(self.chunk_rows) + self.rows
+
+    def record_reset(self, obs, seed=None):
+        """
+        Starts a new episode with the observation returned by env.reset().
+        """
+        self.episodes.append([self.total_rows, 0, seed])
+        self.write_row(obs, -1, 0.0, False, False)
+
+    def record_step(self, action, obs, reward, terminated, truncated):
+        """
+        Records the outcome of env.step(action).
+        """
+        self.write_row(obs, action, reward, terminated, truncated)
+
+    def write_row(self, obs, action, reward, terminated, truncated):
+        env, buffers, row = self.env, self.buffers, self.rows
+        buffers["episode"][row] = len(self.episodes) - 1
+        buffers["step"][row] = env.steps
+        buffers["obs"][row] = obs
+        buffers["action"][row] = action
+        buffers["reward"][row] = reward
+        buffers["terminated"][row] = terminated
+        buffers["truncated"][row] = truncated
+        for idx, robot in enumerate(env.robots):
+            buffers["robot_x"][row, idx] = robot.grid_x
+            buffers["robot_y"][row, idx] = robot.grid_y
+            buffers["held"][row, idx] = self.type_index.get(robot.held_item_type, -1)
+            buffers["flags"][row, idx] = robot.event_bits()
+        buffers["item_present"][row] = env.item_present
+
+        self.episodes[-1][1] += 1
+        self.rows += 1
+        if self.rows == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered rows as the next chunk and rewrites the index, so
+        everything flushed stays readable if recording stops without close().
+        """
+        if not self.rows:
+            return
+        path = chunk_dir(self.directory, len(self.chunk_rows))
+        os.makedirs(path, exist_ok=True)
+        for name, buffer in self.buffers.items():
+            np.save(os.path.join(path, f"{name}.npy"), buffer[:self.rows])
+        self.chunk_rows.append(self.rows)
+        self.rows = 0
+        self.write_index()
+
+    def write_index(self):
+        """
+        Writes index.json for the flushed chunks; the episode still being
+        buffered is cut at the last flushed row.
+        """
+        flushed = sum(self.chunk_rows)
+        episodes = [[start, min(length, flushed - start), seed]
+                    for start, length, seed in self.episodes if start < flushed]
+        index = {
+            "columns": {
+                name: {"shape": list(shape), "dtype": np.dtype(dtype).str} for name, (shape, dtype) in self.columns.items()
+            },
+            "chunks": self.chunk_rows,
+            "episodes": episodes,
+            "pickup_item_types": list(self.env.pickup_item_types),
+            "num_robots": self.env.num_robots,
+            "observation_mode": self.env.observation_mode,
+        }
+        # Written atomically, so a reader never sees a partial index
+        tmp_path = os.path.join(self.directory, INDEX_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(self.directory, INDEX_FILE))
+
+    def close(self):
+        if self.closed:
+            return
+        if self.rows:
+            self.flush()
+        else:
+            self.write_index()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class TrajectoryDataset:
+    """
+    Streaming reader for a TrajectoryRecorder directory. Chunks are opened as
+    read-only memory maps, so iterating or sampling never loads the whole
+    recording; only the rows actually touched are read from disk.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.chunk_rows = self.index["chunks"]
+        self.chunk_starts = np.concatenate([[0], np.cumsum(self.chunk_rows)]).astype(np.int64)
+        self.episodes = self.index["episodes"]
+        self.pickup_item_types = self.index["pickup_item_types"]
+        self.columns = list(self.index["columns"])
+        self._chunks = {}
+        # Global indices of rows that end a transition (every row except resets)
+        rows = [np.arange(start + 1, start + length, dtype=np.int64) for start, length, _ in self.episodes]
+        self.transition_rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return int(self.chunk_starts[-1])
+
+    def chunk(self, chunk_idx):
+        """
+        Memory-mapped columns of one chunk.
+        """
+        columns = self._chunks.get(chunk_idx)
+        if columns is None:
+            path = chunk_dir(self.directory, chunk_idx)
+            columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in self.columns}
+            self._chunks[chunk_idx] = columns
+        return columns
+
+    def iter_chunks(self):
+        """
+        Yields the memory-mapped columns of every chunk in order.
+        """
+        for chunk_idx in range(len(self.chunk_rows)):
+            yield self.chunk(chunk_idx)
+
+    def gather(self, name, rows):
+        """
+        Values of column `name` at the given global row indices (any order).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        chunk_ids = np.searchsorted(self.chunk_starts, rows, side="right") - 1
+        spec = self.index["columns"][name]
+        out = np.empty((len(rows), *spec["shape"]), dtype=np.dtype(spec["dtype"]))
+        for chunk_idx in np.unique(chunk_ids).tolist():
+            mask = chunk_ids == chunk_idx
+            out[mask] = self.chunk(chunk_idx)[name][rows[mask] - self.chunk_starts[chunk_idx]]
+        return out
+
+    def transitions(self, rows):
+        """
+        Batch of (obs, action, reward, next_obs, terminated, truncated) for
+        transitions ending at the given global rows.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        return {
+            "obs": self.gather("obs", rows - 1),
+            "action": self.gather("action", rows),
+            "reward": self.gather("reward", rows),
+            "next_obs": self.gather("obs", rows),
+            "terminated": self.gather("terminated", rows),
+            "truncated": self.gather("truncated", rows),
+        }
+
+    def sample(self, batch_size, rng=None):
+        """
+        Uniformly sampled batch of transitions, e.g. for offline RL or behavior cloning.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        candidates = self.transition_rows
+        return self.transitions(candidates[rng.integers(len(candidates), size=batch_size)])
+
+    def iter_transitions(self, batch_size=4096):
+        """
+        Streams all transitions in recording order, in batches.
+        """
+        candidates = self.transition_rows
+        for start in range(0, len(candidates), batch_size):
+            yield self.transitions(candidates[start:start + batch_size])
+
+    def episode(self, episode_idx):
+        """
+        All columns of one episode, reset row first.
+        """
+        start, length, _ = self.episodes[episode_idx]
+        rows = np.arange(start, start + length, dtype=np.int64)
+        return {name: self.gather(name, rows) for name in self.columns}
+
+    def replay(self, env, episode_idx):
+        """
+        Replays a recorded episode through env's renderer: restores every row's
+        state into `env` and yields env.render() (a frame in rgb_array mode).
+        Animation depends only on the recorded steps and events, so replays
+        of the same episode render identically.
+        """
+        rows = self.episode(episode_idx)
+        env.reset()
+        for row in range(len(rows["step"])):
+            restore_row(env, {name: column[row] for name, column in rows.items()}, self.pickup_item_types)
+            yield env.render()
+
+
+def restore_row(env, row, pickup_item_types):
+    """
+    Puts `env` into the state recorded in one row (robots, held items, event
+    flags, items at stations, step counter).
+    """
+    if len(row["robot_x"]) != len(env.robots) or len(row["item_present"]) != len(env.item_present):
+        raise ValueError("Recorded robots or pickup stations do not match this env; reset() it with the recording's config")
+    env.occupancy[:] = -1
+    for idx, robot in enumerate(env.robots):
+        robot.set_position(int(row["robot_x"][idx]), int(row["robot_y"][idx]))
+        held = int(row["held"][idx])
+        robot.held_item_type = pickup_item_types[held] if held >= 0 else None
+        robot.set_event_bits(int(row["flags"][idx]))
+        env.occupancy[robot.grid_x, robot.grid_y] = idx
+    env.item_present[:] = row["item_present"]
+    env.items_available[:] = np.bincount(env.station_types[env.item_present], minlength=len(env.pickup_item_types))
+    env.steps = int(row["step"])
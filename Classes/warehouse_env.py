@@ -1,9 +1,16 @@
+from time import perf_counter_ns
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
 import pygame
 from Classes import item as i
 from Classes import robot as r
+from Classes import distance_field as df
+from Classes import metrics as mt
+from Classes import profiler as pf
+from Classes import respawn as rs
+from Classes import reservation as rv
+from Classes.Helper.helper import get_non_overlapping_spawn, reset_event_flags
 
 
 class WarehouseEnv(gym.Env):
@@ -11,11 +18,22 @@ class WarehouseEnv(gym.Env):
     Gym-compatible environment for RL training of warehouse delivery agent.
     """
 
-    metadata = {"render_modes": ["human"]}
+    metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 30}
 
-    def __init__( self, map_obj, robot_start_pos, pickup_item_types, tile_size=32, max_steps=500):
+    # Channels of the "grid" observation mode; cells are 0 or 255
+    GRID_CHANNELS = ("walls", "items", "dropzones", "robots", "target_dropzones")
+    WALLS, ITEMS, DROPZONES, ROBOTS, TARGET_DROPZONES = range(len(GRID_CHANNELS))
+
+    def __init__( self, map_obj, robot_start_pos, pickup_item_types, tile_size=32, max_steps=500, render_mode=None,
+                  distance_shaping=0.0, distance_features=False, num_robots=1, spawn_radius=None,
+                  collect_metrics=False, profile=False, observation_mode="vector", view_radius=5,
+                  respawn_delay_steps=10, respawn_distribution="fixed", move_resolution="sequential"):
         super().__init__()
 
+        # None = headless (no pygame display calls), "human" = window, "rgb_array" = off-screen frames
+        assert render_mode is None or render_mode in self.metadata["render_modes"]
+        self.render_mode = render_mode
+
         # Store environment configuration
         self.map = map_obj
         self.robot_start_pos = robot_start_pos
@@ -23,10 +41,27 @@ class WarehouseEnv(gym.Env):
         self.tile_size = tile_size
         self.max_steps = max_steps
 
-        # Pygame sprite group to hold items
-        self.item_group = pygame.sprite.Group()
-        # Robot instance (initialized in reset)
-        self.robot = None
+        # Optional use of the map's BFS distance fields:
+        # shaping adds distance_shaping * (moves saved towards the current goal) to the reward,
+        # features append [pickup distance, dropzone distance] to the observation
+        self.distance_shaping = distance_shaping
+        self.distance_features = distance_features
+
+        # -- Logic state (no pygame objects) --
+        # Robot states (initialized in reset). Robot 0 starts at robot_start_pos, the others
+        # spawn on free cells within spawn_radius of it (default: anywhere on the map)
+        self.num_robots = num_robots
+        self.spawn_radius = spawn_radius if spawn_radius is not None else max(self.map.width, self.map.height)
+        self.robots = []
+        # Occupancy grid indexed [x, y]: index of the robot on each cell, -1 if free.
+        # Keeps robot-robot collision checks O(1) per move.
+        self.occupancy = np.full((self.map.width, self.map.height), -1, dtype=np.int32)
+        # "sequential": robots move one after another in index order (a robot may enter a cell
+        # freed earlier in the same step); "simultaneous": all move at once, conflicts
+        # resolved order-independently by reservation.resolve_moves
+        assert move_resolution in ("sequential", "simultaneous")
+        self.move_resolution = move_resolution
+        self.move_outcomes = None
         # Step counter
         self.steps = 0
 
@@ -34,117 +69,176 @@ class WarehouseEnv(gym.Env):
         self.deliveries_done = 0
         self.max_deliveries = 3
 
-        # Track item respawn timers
-        self.respawn_timers = {item_type: 0 for item_type in self.pickup_item_types}
-        self.respawn_delay_steps = 10  # e.g. delay of 10 steps after pickup
+        # Pickup cell per item type index; (-1, -1) if the map has no pickup for it.
+        # A type may have several stations; this is the first one, as shown in the observation
+        self.pickup_positions = np.array(
+            [self.map.get_pickup_location(t) or (-1, -1) for t in self.pickup_item_types],
+            dtype=np.int32
+        ).reshape(-1, 2)
+        self.has_pickup = self.pickup_positions[:, 0] >= 0
+        # All pickup stations: cell, item type index, and station number per cell (-1 if none)
+        self.station_positions, self.station_types, self.pickup_grid = self.map.pickup_stations(self.pickup_item_types)
+        # Whether an item currently waits at each station, and how many wait per item type
+        self.item_present = np.zeros(len(self.station_types), dtype=bool)
+        self.items_available = np.zeros(len(self.pickup_item_types), dtype=np.int32)
+        # Stations per item type (and their Map station index), for distances to the non-empty ones
+        self.station_counts = np.bincount(self.station_types, minlength=len(self.pickup_item_types))
+        self.type_stations = [np.flatnonzero(self.station_types == idx).tolist() for idx in range(len(self.pickup_item_types))]
+        self.station_map_ids = self.map.pickup_ids[self.station_positions[:, 0], self.station_positions[:, 1]].tolist()
+
+        # Respawns after pickup: mean delay in steps (one value or one per station),
+        # drawn per respawn from respawn_distribution (see respawn.RespawnScheduler)
+        self.respawn_delay_steps = respawn_delay_steps
+        self.respawns = rs.RespawnScheduler(len(self.station_types), respawn_delay_steps, respawn_distribution)
+
+        # Optional event counters; finished episodes report them as info["episode_metrics"]
+        self.metrics = mt.EpisodeMetrics() if collect_metrics else None
+        # Optional per-phase timing of step(); see profiler.StepProfiler
+        self.profiler = pf.StepProfiler() if profile else None
+
+        # -- Render view (sprites built lazily in render) --
+        # Pygame sprite group to hold items that are currently present
+        self.item_group = pygame.sprite.Group()
+        self.item_sprites = None
+        self.robot_sprites = None
 
         # Defines Action Space
         self.action_space = spaces.Discrete(4)  # LEFT, RIGHT, UP, DOWN
+        if self.num_robots > 1:
+            # One action per robot
+            self.action_space = spaces.MultiDiscrete([4] * self.num_robots)
 
         # -- Define Observation Space --
-        # E.g.:
-        # [robot_x, robot_y, held_item_onehot(2), pickups (2*len)]
-        obs_dim = 2 + 2 + 2 * len(self.pickup_item_types)
-        self.observation_space = spaces.Box(
-            low=0.0,
-            high=1.0,
-            shape=(obs_dim,),
-            dtype=np.float32
-        )
+        # "vector": [robot_x, robot_y, held_item_onehot(2), pickups (2*len), (goal distances(2))]
+        # "grid": egocentric (channel, y, x) window of GRID_CHANNELS, see robot_grid_observation
+        assert observation_mode in ("vector", "grid")
+        self.observation_mode = observation_mode
+        if observation_mode == "grid":
+            self.view_radius = view_radius
+            view_size = 2 * view_radius + 1
+            obs_shape = (len(self.GRID_CHANNELS), view_size, view_size)
+            self.observation_space = spaces.Box(
+                low=0,
+                high=255,
+                shape=obs_shape if self.num_robots == 1 else (self.num_robots, *obs_shape),
+                dtype=np.uint8
+            )
+            self.build_grid_layers()
+        else:
+            obs_dim = 2 + 2 + 2 * len(self.pickup_item_types)
+            if self.distance_features:
+                obs_dim += 2
+            self.observation_space = spaces.Box(
+                low=0.0,
+                high=1.0,
+                shape=(obs_dim,) if self.num_robots == 1 else (self.num_robots, obs_dim),
+                dtype=np.float32
+            )
+
+            # Static part of the observation: normalized pickup locations
+            self.obs_template = np.zeros(obs_dim, dtype=np.float32)
+            for idx, pos in enumerate(self.pickup_positions):
+                if self.has_pickup[idx]:
+                    self.obs_template[4 + 2 * idx] = self._norm(pos[0], self.map.width - 1)
+                    self.obs_template[5 + 2 * idx] = self._norm(pos[1], self.map.height - 1)
+
+        # Observations are written in place into this buffer every step
+        self.obs_buffer = np.zeros(self.observation_space.shape, dtype=self.observation_space.dtype)
 
         self.screen = None
+        self.background = None
+        self.background_version = None  # map.wall_version the background was rendered at
+        self.drawn_rects = []
+        self.frame = None
 
     def reset(self, seed=None, options=None):
         """
         Gym API method to reset the environment at the start of an episode.
         """
         super().reset(seed=seed)
+        # Count the previous episode only if it ran (not on the first reset or a reset without steps)
+        if self.profiler is not None and self.steps > 0:
+            self.profiler.end_episode()
         self.steps = 0
 
         # Reset delivery counter and timers
         self.deliveries_done = 0
-        self.respawn_timers = {item_type: 0 for item_type in self.pickup_item_types}
-
-        # -- Reset robot --
-        if self.robot:
-            self.robot.kill()
-        self.robot = r.Robot(
-            bot_id=1,
-            grid_pos=self.robot_start_pos,
-            groups=(self.map.all_sprites_group,),
-            grid_size=(self.map.width, self.map.height),
-            tile_size=self.tile_size
-        )
+        self.respawns.clear()
+
+        # -- Reset robots --
+        self.occupancy[:] = -1
+        self.robots = []
+        for idx in range(self.num_robots):
+            if idx == 0:
+                grid_pos = tuple(self.robot_start_pos)
+            else:
+                grid_pos = get_non_overlapping_spawn(
+                    self.occupancy, *self.robot_start_pos, self.spawn_radius, self.spawn_radius,
+                    self.map.is_blocked, self.np_random
+                )
+            self.robots.append(r.RobotState(bot_id=idx + 1, grid_pos=grid_pos))
+            self.occupancy[grid_pos] = idx
 
         # -- Reset items --
-        for sprite in self.item_group:
-            sprite.kill()
-        self.item_group.empty()
+        self.item_present[:] = True
+        self.items_available[:] = self.station_counts
 
-        for item_type in self.pickup_item_types:
-            pickup_pos = self.map.get_pickup_location(item_type)
-            if pickup_pos:
-                i.Item(
-                    grid_pos=pickup_pos,
-                    tile_size=self.tile_size,
-                    groups=(self.map.all_sprites_group, self.item_group),
-                    item_type=item_type
-                )
+        if self.metrics is not None:
+            self.metrics.start_episode()
+        if self.observation_mode == "grid":
+            self.refresh_wall_layer()
 
-        return self.get_observation(), {}
+        # Built in a fresh array, never in obs_buffer: vec envs keep the last step's
+        # observation (obs_buffer itself) as terminal_observation while resetting
+        return self.get_observation(np.empty_like(self.obs_buffer)), {}
+
+    @property
+    def robot(self):
+        """
+        The first robot; the only one in single-robot mode.
+        """
+        return self.robots[0] if self.robots else None
 
     def step(self, action):
-        action = int(action)
+        """
+        Gym API step. With num_robots > 1, `action` holds one action per robot,
+        robots move in index order, and observation/reward are per robot.
+        """
+        prof = self.profiler
+        if prof is not None:
+            step_start = perf_counter_ns()
+
         self.steps += 1
-        reward = -1.0  # step cost
         terminated = False
         info = {}
 
-        # -- Propose move --
-        new_x, new_y = self.robot.propose_move(action)
-        if self.map.is_blocked(new_x, new_y):
-            reward -= 5.0  # collision penalty
+        if self.num_robots == 1:
+            reward = self.step_robot(0, int(action))
         else:
-            self.robot.set_position(new_x, new_y)
-
-        # -- Check pickup --
-        for item in list(self.item_group):
-            if (item.grid_x, item.grid_y) == (self.robot.grid_x, self.robot.grid_y):
-                self.robot.pickup_item(item)
-                item.kill()
-                reward += 5.0
+            actions = np.asarray(action).reshape(self.num_robots)
+            if self.move_resolution == "simultaneous":
+                if prof is not None:
+                    resolve_start = perf_counter_ns()
+                self.resolve_moves(actions)
+                if prof is not None:
+                    prof.add(pf.MOVE, resolve_start, perf_counter_ns() - resolve_start)
+            reward = np.array(
+                [self.step_robot(idx, int(a)) for idx, a in enumerate(actions)],
+                dtype=np.float32
+            )
 
-                # Start respawn timer
-                self.respawn_timers[item.item_type] = self.respawn_delay_steps
+        if prof is not None:
+            lap = perf_counter_ns()
 
-                break
+        # Respawn items that are due; one comparison when none is
+        respawns = self.respawns
+        if respawns.heap and respawns.heap[0][0] <= self.steps:
+            for station in respawns.pop_due(self.steps):
+                self.item_present[station] = True
+                self.items_available[self.station_types[station]] += 1
 
-        # -- Check delivery --
-        if self.robot.held_item_type:
-            dropzone = self.map.get_delivery_zone(self.robot.held_item_type)
-            if dropzone and dropzone.contains(self.robot.grid_x, self.robot.grid_y):
-                delivered = self.robot.deliver_item(dropzone)
-                if delivered:
-                    reward += 10.0
-
-                    # Increment deliveries
-                    self.deliveries_done += 1
-                    print(f"Delivery count: {self.deliveries_done}")
-
-        # Handle respawn timers
-        for item_type in self.pickup_item_types:
-            if self.respawn_timers[item_type] > 0:
-                self.respawn_timers[item_type] -= 1
-                if self.respawn_timers[item_type] == 0:
-                    # Respawn item
-                    pickup_pos = self.map.get_pickup_location(item_type)
-                    if pickup_pos:
-                        i.Item(
-                            grid_pos=pickup_pos,
-                            tile_size=self.tile_size,
-                            groups=(self.map.all_sprites_group, self.item_group),
-                            item_type=item_type
-                        )
+        if prof is not None:
+            lap = prof.lap(pf.RESPAWN, lap)
 
         # -- Check episode termination --
         if self.steps >= self.max_steps:
@@ -153,74 +247,483 @@ class WarehouseEnv(gym.Env):
         # End episode after 3 deliveries
         if self.deliveries_done >= self.max_deliveries:
             terminated = True
-            print("3 deliveries achieved. Ending episode.")
+
+        metrics = self.metrics
+        if metrics is not None:
+            for robot in self.robots:
+                metrics.record_robot(robot, self.steps)
+            if terminated:
+                info["episode_metrics"] = metrics.end_episode(self.steps)
+            if prof is not None:
+                lap = prof.lap(pf.METRICS, lap)
 
         observation = self.get_observation()
-        self.render()
+        if prof is not None:
+            lap = prof.lap(pf.OBSERVATION, lap)
+
+        if self.render_mode == "human":
+            self.render()
+            if prof is not None:
+                prof.lap(pf.RENDER, lap)
+
+        if prof is not None:
+            prof.add(pf.STEP, step_start, perf_counter_ns() - step_start)
         return observation, reward, terminated, False, info
 
-    def get_observation(self):
+    def resolve_moves(self, actions):
+        """
+        Simultaneous-move mode: resolves every robot's move at once (see
+        reservation.resolve_moves) and updates the occupancy grid; step_robot
+        then applies each robot's outcome.
         """
-        Builds observation vector.
+        positions = [(robot.grid_x, robot.grid_y) for robot in self.robots]
+        targets = [robot.propose_move(int(action)) for robot, action in zip(self.robots, actions)]
+        final, self.move_outcomes = rv.resolve_moves(positions, targets, self.map.is_blocked)
+
+        occupancy = self.occupancy
+        for (x, y), outcome in zip(positions, self.move_outcomes):
+            if outcome == rv.MOVED:
+                occupancy[x, y] = -1
+        for idx, ((x, y), outcome) in enumerate(zip(final, self.move_outcomes)):
+            if outcome == rv.MOVED:
+                occupancy[x, y] = idx
+
+    def step_robot(self, idx, action):
+        """
+        Moves one robot and resolves its pickup and delivery. Returns its reward.
+        """
+        reward = -1.0  # step cost
+        robot = self.robots[idx]
+        reset_event_flags(robot)
+        if self.distance_shaping:
+            prev_distance = self.goal_distance(robot)
+
+        prof = self.profiler
+        if prof is not None:
+            lap = perf_counter_ns()
+
+        # -- Propose move --
+        new_x, new_y = robot.propose_move(action)
+        if self.move_outcomes is not None:
+            # Resolved for all robots at once by resolve_moves (occupancy already updated)
+            outcome = self.move_outcomes[idx]
+            if outcome == rv.WALL:
+                reward -= 5.0  # collision penalty
+                robot.collided_with_wall = True
+            elif outcome == rv.ROBOT:
+                reward -= 5.0  # collision penalty
+                robot.collided_with_robot = True
+            else:
+                robot.set_position(new_x, new_y)
+        elif self.map.is_blocked(new_x, new_y):
+            reward -= 5.0  # collision penalty
+            robot.collided_with_wall = True
+        elif self.occupancy[new_x, new_y] >= 0:
+            reward -= 5.0  # collision penalty
+            robot.collided_with_robot = True
+        else:
+            self.occupancy[robot.grid_x, robot.grid_y] = -1
+            self.occupancy[new_x, new_y] = idx
+            robot.set_position(new_x, new_y)
+
+        if prof is not None:
+            lap = prof.lap(pf.MOVE, lap)
+
+        # -- Check pickup --
+        station = self.pickup_grid[robot.grid_x, robot.grid_y]
+        if station >= 0 and self.item_present[station]:
+            item_idx = self.station_types[station]
+            robot.pickup_item(self.pickup_item_types[item_idx])
+            self.item_present[station] = False
+            self.items_available[item_idx] -= 1
+            reward += 5.0
+
+            # Schedule the respawn
+            self.respawns.schedule(station, self.steps, self.np_random)
+
+        if prof is not None:
+            lap = prof.lap(pf.PICKUP, lap)
+
+        # -- Check delivery --
+        if robot.held_item_type:
+            accepted_types = self.map.dropzone_accepts[self.map.dropzone_ids[robot.grid_x, robot.grid_y]]
+            if accepted_types and robot.deliver_item(accepted_types):
+                reward += 10.0
+
+                # Increment deliveries
+                self.deliveries_done += 1
+
+        if prof is not None:
+            prof.lap(pf.DELIVERY, lap)
+
+        # -- Optional distance shaping towards the goal the step started with --
+        if self.distance_shaping:
+            if robot.just_picked_up or robot.just_delivered:
+                # Reached it; distances to the next goal only count from the next step
+                new_distance = 0
+            else:
+                new_distance = self.goal_distance(robot)
+            if prev_distance != df.UNREACHABLE and new_distance != df.UNREACHABLE:
+                reward += self.distance_shaping * (prev_distance - new_distance)
+
+        return reward
+
+    def get_observation(self, out=None):
+        """
+        Writes the observation into `out` (default obs_buffer) and returns it
+        (one row per robot when num_robots > 1). obs_buffer is reused by the next step.
+        """
+        out = out if out is not None else self.obs_buffer
+        if self.observation_mode == "grid":
+            self.update_grid_layers()
+            fill = self.robot_grid_observation
+        else:
+            fill = self.robot_observation
+
+        if self.num_robots == 1:
+            fill(self.robots[0], out)
+        else:
+            for robot, obs in zip(self.robots, out):
+                fill(robot, obs)
+        return out
+
+    def robot_observation(self, robot, obs):
+        """
+        Writes the observation vector of one robot into `obs`.
         Example design (all normalized 0..1):
         [robot_x, robot_y, held_item_onehot, pickup positions...]
         """
-        obs = []
-
-        # Normalization helper
-        def norm(v, maxv):
-            return v / maxv if maxv else 0.0
+        # -- Pickup locations are static and come from obs_template --
+        obs[:] = self.obs_template
 
         # -- Robot position --
-        obs.append(norm(self.robot.grid_x, self.map.width - 1))
-        obs.append(norm(self.robot.grid_y, self.map.height - 1))
+        obs[0] = self._norm(robot.grid_x, self.map.width - 1)
+        obs[1] = self._norm(robot.grid_y, self.map.height - 1)
 
         # -- Held item one-hot --
-        if self.robot.held_item_type == "A":
-            obs += [1.0, 0.0]
-        elif self.robot.held_item_type == "B":
-            obs += [0.0, 1.0]
-        else:
-            obs += [0.0, 0.0]
-
-        # -- Pickup locations --
-        for item_type in self.pickup_item_types:
-            pos = self.map.get_pickup_location(item_type)
-            if pos:
-                obs.append(norm(pos[0], self.map.width - 1))
-                obs.append(norm(pos[1], self.map.height - 1))
+        if robot.held_item_type == "A":
+            obs[2] = 1.0
+        elif robot.held_item_type == "B":
+            obs[3] = 1.0
+
+        # -- Distances to the nearest present pickup and to the held item's dropzone --
+        if self.distance_features:
+            obs[-2] = self._norm_distance(self.pickup_distance(robot))
+            obs[-1] = self._norm_distance(self.dropzone_distance(robot))
+
+    # ====== State snapshots ======
+
+    # get_state() layout (int64): header, robots, stations, then the RNG words
+    STATE_HEADER = 4  # steps, deliveries_done, respawn sequence, pending respawns
+    ROBOT_STATE = 4  # x, y, held item type index (-1 = empty), RobotState.event_bits()
+    STATION_STATE = 4  # item present, plus one (due step, sequence, station) respawn heap entry
+    RNG_STATE = 6  # PCG64 state and increment (two 64-bit words each), has_uint32, uinteger
+
+    @property
+    def state_size(self):
+        return (self.STATE_HEADER + self.ROBOT_STATE * self.num_robots
+                + self.STATION_STATE * len(self.station_types) + self.RNG_STATE)
+
+    def get_state(self, out=None):
+        """
+        Snapshot of everything step() depends on as a flat int64 array of
+        state_size entries (written into `out` if given). Restoring it with
+        set_state() resumes the episode exactly, including respawn delays drawn
+        from np_random. Sprites, metrics and profiler are not part of it.
+        """
+        state = out if out is not None else np.empty(self.state_size, dtype=np.int64)
+        heap = self.respawns.heap
+        state[:self.STATE_HEADER] = (self.steps, self.deliveries_done, self.respawns.sequence, len(heap))
+
+        start = self.STATE_HEADER
+        robots = state[start:start + self.ROBOT_STATE * self.num_robots].reshape(-1, self.ROBOT_STATE)
+        type_index = self.pickup_item_types.index
+        for row, robot in zip(robots, self.robots):
+            held = type_index(robot.held_item_type) if robot.held_item_type is not None else -1
+            row[:] = (robot.grid_x, robot.grid_y, held, robot.event_bits())
+
+        # A station has at most one pending respawn, so the heap fits in S entries
+        start += robots.size
+        num_stations = len(self.station_types)
+        state[start:start + num_stations] = self.item_present
+        start += num_stations
+        entries = state[start:start + 3 * num_stations].reshape(-1, 3)
+        if heap:
+            entries[:len(heap)] = heap
+        entries[len(heap):] = 0
+
+        rng = self.np_random.bit_generator.state
+        if rng["bit_generator"] != "PCG64":
+            raise ValueError(f"get_state supports PCG64 generators only, got {rng['bit_generator']}")
+        pcg, inc = rng["state"]["state"], rng["state"]["inc"]
+        state[-self.RNG_STATE:].view(np.uint64)[:] = (
+            pcg >> 64, pcg & 0xFFFFFFFFFFFFFFFF, inc >> 64, inc & 0xFFFFFFFFFFFFFFFF,
+            rng["has_uint32"], rng["uinteger"]
+        )
+        return state
+
+    def set_state(self, state):
+        """
+        Restores a get_state() snapshot in place. Only logic state is touched:
+        no sprites are rebuilt and no images loaded (render() picks the new state up).
+        """
+        steps, self.deliveries_done, sequence, pending = state[:self.STATE_HEADER].tolist()
+        self.steps = steps
+
+        start = self.STATE_HEADER
+        robots = state[start:start + self.ROBOT_STATE * self.num_robots].reshape(-1, self.ROBOT_STATE).tolist()
+        if len(self.robots) != self.num_robots:
+            self.robots = [r.RobotState(bot_id=idx + 1, grid_pos=(0, 0)) for idx in range(self.num_robots)]
+        self.occupancy[:] = -1
+        for idx, (robot, (x, y, held, bits)) in enumerate(zip(self.robots, robots)):
+            robot.set_position(x, y)
+            robot.held_item_type = self.pickup_item_types[held] if held >= 0 else None
+            robot.set_event_bits(bits)
+            self.occupancy[x, y] = idx
+
+        start += self.ROBOT_STATE * self.num_robots
+        num_stations = len(self.station_types)
+        self.item_present[:] = state[start:start + num_stations]
+        self.items_available[:] = np.bincount(self.station_types[self.item_present], minlength=len(self.pickup_item_types))
+        start += num_stations
+        # Entries were saved in heap order, so the list is a valid heap as is
+        self.respawns.heap[:] = map(tuple, state[start:start + 3 * pending].reshape(-1, 3).tolist())
+        self.respawns.sequence = sequence
+
+        pcg_hi, pcg_lo, inc_hi, inc_lo, has_uint32, uinteger = state[-self.RNG_STATE:].view(np.uint64).tolist()
+        self.np_random.bit_generator.state = {
+            "bit_generator": "PCG64",
+            "state": {"state": (pcg_hi << 64) | pcg_lo, "inc": (inc_hi << 64) | inc_lo},
+            "has_uint32": has_uint32,
+            "uinteger": uinteger,
+        }
+
+    # ====== Grid observation ======
+
+    def build_grid_layers(self):
+        """
+        Allocates the map-sized channel layers, stored (channel, y, x) and padded
+        by view_radius on every side, so a robot's window is one slice even at
+        the map border. Cells outside the map read as walls.
+        """
+        pad = self.view_radius
+        height, width = self.map.height + 2 * pad, self.map.width + 2 * pad
+        self.grid_layers = np.zeros((len(self.GRID_CHANNELS) - 1, height, width), dtype=np.uint8)
+        self.grid_interior = (slice(pad, pad + self.map.height), slice(pad, pad + self.map.width))
+
+        # Dropzones of every type, plus one layer per item type for the target channel
+        # (index len(pickup_item_types) stays empty: nothing held), from the map's zone index
+        self.item_type_index = {item_type: idx for idx, item_type in enumerate(self.pickup_item_types)}
+        zone_ids = self.map.dropzone_ids.T
+        accepts = self.map.dropzone_accept_table(self.pickup_item_types)
+        self.grid_layers[self.DROPZONES][self.grid_interior] = (zone_ids > 0) * np.uint8(255)
+        self.target_dropzone_layers = np.zeros((len(self.pickup_item_types) + 1, height, width), dtype=np.uint8)
+        self.target_dropzone_layers[(slice(None), *self.grid_interior)] = \
+            accepts[zone_ids].transpose(2, 0, 1) * np.uint8(255)
+
+        # Padded (row, col) of every pickup that exists on the map
+        self.item_cells = (self.station_positions[:, 1] + pad, self.station_positions[:, 0] + pad)
+        self.robot_cells = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        self.refresh_wall_layer()
+
+    def refresh_wall_layer(self):
+        """
+        Copies the map's collision grid into the walls channel (done on reset,
+        so walls changed through Map.set_blocked show up from the next episode).
+        """
+        walls = self.grid_layers[self.WALLS]
+        walls.fill(255)
+        walls[self.grid_interior] = self.map.collision_map.T * np.uint8(255)
+
+    def update_grid_layers(self):
+        """
+        Moves the dynamic channels to the current step: present items and robots.
+        Touches only pickup and robot cells, so the cost does not grow with the map.
+        """
+        self.grid_layers[self.ITEMS][self.item_cells] = self.item_present * np.uint8(255)
+
+        robots = self.grid_layers[self.ROBOTS]
+        robots[self.robot_cells] = 0
+        pad = self.view_radius
+        self.robot_cells = (
+            np.array([robot.grid_y + pad for robot in self.robots]),
+            np.array([robot.grid_x + pad for robot in self.robots]),
+        )
+        robots[self.robot_cells] = 255
+
+    def robot_grid_observation(self, robot, obs):
+        """
+        Writes the egocentric window around one robot into `obs`, shape
+        (channel, 2 * view_radius + 1, 2 * view_radius + 1), robot in the centre.
+        The robots channel shows only the other robots; target_dropzones shows the
+        dropzones accepting the held item (empty when nothing is held).
+        """
+        size = 2 * self.view_radius + 1
+        rows = slice(robot.grid_y, robot.grid_y + size)
+        cols = slice(robot.grid_x, robot.grid_x + size)
+        obs[:self.TARGET_DROPZONES] = self.grid_layers[:, rows, cols]
+        obs[self.ROBOTS, self.view_radius, self.view_radius] = 0
+
+        target = self.item_type_index.get(robot.held_item_type, len(self.pickup_item_types))
+        obs[self.TARGET_DROPZONES] = self.target_dropzone_layers[target, rows, cols]
+
+    def pickup_distance(self, robot):
+        """
+        Moves from the robot to the nearest pickup station that currently has
+        an item waiting; empty stations are ignored.
+        """
+        best = df.UNREACHABLE
+        x, y = robot.grid_x, robot.grid_y
+        for idx, item_type in enumerate(self.pickup_item_types):
+            available = self.items_available[idx]
+            if not available:
+                continue
+            if available == self.station_counts[idx]:
+                # Every station of the type holds an item: one lookup in the combined field
+                distances = [self.map.distance_to_pickup(item_type, x, y)]
             else:
-                obs += [0.0, 0.0]
+                distances = [self.map.distance_to_station(self.station_map_ids[station], x, y)
+                             for station in self.type_stations[idx] if self.item_present[station]]
+            for distance in distances:
+                if distance != df.UNREACHABLE and (best == df.UNREACHABLE or distance < best):
+                    best = distance
+        return best
+
+    def dropzone_distance(self, robot):
+        """
+        Moves from the robot into the dropzone of the held item, if any.
+        """
+        if not robot.held_item_type:
+            return df.UNREACHABLE
+        return self.map.distance_to_dropzone(robot.held_item_type, robot.grid_x, robot.grid_y)
 
-        return np.array(obs, dtype=np.float32)
+    def goal_distance(self, robot):
+        """
+        Distance to the current goal: the dropzone when holding an item, else the nearest pickup.
+        """
+        if robot.held_item_type:
+            return self.dropzone_distance(robot)
+        return self.pickup_distance(robot)
 
-    def render(self, mode="human"):
-        # Handle Pygame events so the window doesn't freeze
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.close()
-                exit()  # Or raise SystemExit
+    def _norm_distance(self, distance):
+        """
+        Normalizes a path distance to 0..1; unreachable maps to 1.
+        """
+        if distance == df.UNREACHABLE:
+            return 1.0
+        return min(distance / (self.map.width * self.map.height), 1.0)
 
-        if not self.screen:
-            self.screen = pygame.display.set_mode(
-                (self.map.width * self.tile_size, self.map.height * self.tile_size)
-            )
-            pygame.display.set_caption("Warehouse RL Environment")
+    @staticmethod
+    def _norm(v, maxv):
+        """
+        Normalization helper.
+        """
+        return v / maxv if maxv else 0.0
+
+    def render(self):
+        """
+        Draws the current state. In rgb_array mode returns a (height, width, 3)
+        uint8 view of the screen; copy it to keep a frame past the next render().
+        """
+        if self.render_mode is None:
+            gym.logger.warn("render() called without a render_mode; pass render_mode='human' or 'rgb_array'.")
+            return None
+
+        redraw_all = not self.screen
+        if redraw_all:
+            size = (self.map.width * self.tile_size, self.map.height * self.tile_size)
+            if self.render_mode == "human":
+                pygame.init()
+                self.screen = pygame.display.set_mode(size)
+                pygame.display.set_caption("Warehouse RL Environment")
+            else:
+                # Draw straight into a NumPy buffer, so frames are views instead of copies
+                frame_buffer = np.zeros((size[1], size[0], 4), dtype=np.uint8)
+                self.screen = pygame.image.frombuffer(frame_buffer, size, "RGBX")
+                self.frame = frame_buffer[:, :, :3]
+            self.drawn_rects = []
+
+        # Tiles and grid are drawn once; frames only restore the parts sprites covered.
+        # Map.set_blocked drops the map's background, so fetch the rebuilt one and repaint
+        if redraw_all or self.background_version != self.map.wall_version:
+            self.background = self.map.render_background()
+            self.background_version = self.map.wall_version
+            redraw_all = True
+
+        if self.render_mode == "human":
+            # Handle Pygame events so the window doesn't freeze
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.close()
+                    exit()  # Or raise SystemExit
+                if event.type == pygame.VIDEOEXPOSE:
+                    redraw_all = True
+
+        self.sync_sprites()
+
+        # Erase last frame's sprites by copying the background back under them
+        screen, background = self.screen, self.background
+        if redraw_all:
+            screen.blit(background, (0, 0))
+        else:
+            for rect in self.drawn_rects:
+                screen.blit(background, rect, rect)
+
+        # Draw the sprites, remembering the rectangles they cover
+        dirty_rects = self.drawn_rects
+        self.drawn_rects = [screen.blit(sprite.image, sprite.rect) for sprite in self.item_group]
+        for sprite in self.robot_sprites:
+            self.drawn_rects.append(screen.blit(sprite.image, sprite.hitbox))
+
+        if self.render_mode == "human":
+            if redraw_all:
+                pygame.display.flip()
+            else:
+                # Only push the rectangles that changed since the last frame
+                pygame.display.update(dirty_rects + self.drawn_rects)
+            return None
 
-        self.screen.fill((0, 0, 0))  # Clear
+        # (height, width, 3) view of the screen, overwritten by the next render()
+        return self.frame
 
-        # Draw the map and sprites
-        self.map.render_layer_group.draw(self.screen)
-        self.item_group.draw(self.screen)
-        self.screen.blit(self.robot.image, self.robot.hitbox)
+    def sync_sprites(self):
+        """
+        Builds the sprite view on first use and mirrors the logic state into it.
+        """
+        if self.robot_sprites is None:
+            self.robot_sprites = [
+                r.Robot(
+                    bot_id=robot.bot_id,
+                    grid_pos=(robot.grid_x, robot.grid_y),
+                    groups=(self.map.all_sprites_group,),
+                    grid_size=(self.map.width, self.map.height),
+                    tile_size=self.tile_size
+                )
+                for robot in self.robots
+            ]
+            self.item_sprites = [
+                i.Item(
+                    grid_pos=tuple(pos.tolist()),
+                    tile_size=self.tile_size,
+                    groups=(self.map.all_sprites_group,),
+                    item_type=self.pickup_item_types[item_idx]
+                )
+                for pos, item_idx in zip(self.station_positions, self.station_types)
+            ]
 
-        # Optional grid overlay
-        self.map.draw_grid_debug(self.screen)
+        for sprite, robot in zip(self.robot_sprites, self.robots):
+            sprite.sync(robot, self.steps)
+            sprite.update()
 
-        pygame.display.flip()
+        self.item_group.empty()
+        for sprite, present in zip(self.item_sprites, self.item_present):
+            if present:
+                self.item_group.add(sprite)
 
     def close(self):
-        if self.screen:
+        if self.screen and self.render_mode == "human":
             pygame.display.quit()
-            self.screen = None
-        pygame.quit()
\ No newline at end of file
+        self.screen = None
+        self.frame = None
+        if self.render_mode is not None:
+            pygame.quit()
\ No newline at end of file
@@ -0,0 +1,235 @@
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+from Classes import metrics as mt
+from Classes import robot as r
+
+
+class WarehouseVecEnv(VecEnv):
+    """
+    SB3 VecEnv that steps N independent warehouses on the same map in one batch.
+    State is kept in arrays with the batch as first axis; transitions and rewards
+    match WarehouseEnv.step() for each warehouse.
+    """
+
+    def __init__(self, map_obj, robot_start_pos, pickup_item_types, num_envs, tile_size=32, max_steps=500,
+                 collect_metrics=False):
+        # Store environment configuration
+        self.map = map_obj
+        self.robot_start_pos = np.array(robot_start_pos, dtype=np.int32)
+        self.pickup_item_types = list(pickup_item_types)
+        self.tile_size = tile_size
+        self.max_steps = max_steps
+        self.max_deliveries = 3
+        self.respawn_delay_steps = 10
+        self.render_mode = None
+
+        n_types = len(self.pickup_item_types)
+
+        # Movement deltas indexed by action, taken from Robot.ACTIONS
+        self.action_deltas = np.array([r.Robot.ACTIONS[a] for a in sorted(r.Robot.ACTIONS)], dtype=np.int32)
+        # Collision grid indexed [x, y]
+        self.collision_map = np.asarray(self.map.collision_map, dtype=bool)
+
+        # Pickup cell per item type index; (-1, -1) if the map has no pickup for it
+        self.pickup_positions = np.array(
+            [self.map.get_pickup_location(t) or (-1, -1) for t in self.pickup_item_types],
+            dtype=np.int32
+        ).reshape(-1, 2)
+        self.has_pickup = self.pickup_positions[:, 0] >= 0
+
+        # Pickup stations (several per type possible): item type index per station and
+        # station number per cell (-1 if none); whether each dropzone id of the map
+        # accepts each item type (trailing column: nothing held)
+        _, self.station_types, self.pickup_grid = self.map.pickup_stations(self.pickup_item_types)
+        n_stations = len(self.station_types)
+        self.dropzone_ids = self.map.dropzone_ids
+        self.zone_accepts = self.map.dropzone_accept_table(self.pickup_item_types)
+
+        # Held item one-hot column in the observation ("A" -> 2, "B" -> 3), -1 if none.
+        # The trailing -1 entry is what held == -1 (empty) indexes into.
+        self.held_obs_column = np.array(
+            [{"A": 2, "B": 3}.get(t, -1) for t in self.pickup_item_types] + [-1],
+            dtype=np.int32
+        )
+
+        # -- Batched state --
+        self.positions = np.zeros((num_envs, 2), dtype=np.int32)
+        # Held item type index per warehouse, -1 = empty
+        self.held = np.full(num_envs, -1, dtype=np.int32)
+        # Per station; fixed respawn delays as countdown timers (WarehouseEnv's default)
+        self.item_present = np.zeros((num_envs, n_stations), dtype=bool)
+        self.respawn_timers = np.zeros((num_envs, n_stations), dtype=np.int32)
+        self.steps = np.zeros(num_envs, dtype=np.int32)
+        self.deliveries_done = np.zeros(num_envs, dtype=np.int32)
+        self.actions = np.zeros(num_envs, dtype=np.int64)
+
+        # Optional event counters per warehouse, columns in metrics.METRIC_FIELDS order;
+        # finished episodes report them as info["episode_metrics"] and in the ring buffer
+        self.metrics = mt.EpisodeMetrics() if collect_metrics else None
+        self.metric_counts = np.zeros((num_envs, len(mt.METRIC_FIELDS)), dtype=np.int32)
+        self.metric_columns = {name: idx for idx, name in enumerate(mt.METRIC_FIELDS)}
+
+        # Same spaces as WarehouseEnv
+        action_space = spaces.Discrete(4)  # LEFT, RIGHT, UP, DOWN
+        obs_dim = 2 + 2 + 2 * n_types
+        observation_space = spaces.Box(low=0.0, high=1.0, shape=(obs_dim,), dtype=np.float32)
+
+        # Static part of the observation: normalized pickup locations
+        self.obs_template = np.zeros(obs_dim, dtype=np.float32)
+        for idx, pos in enumerate(self.pickup_positions):
+            if self.has_pickup[idx]:
+                self.obs_template[4 + 2 * idx] = self._norm(pos[0], self.map.width - 1)
+                self.obs_template[5 + 2 * idx] = self._norm(pos[1], self.map.height - 1)
+        self.obs_buffer = np.tile(self.obs_template, (num_envs, 1))
+        self.rows = np.arange(num_envs)
+
+        super().__init__(num_envs, observation_space, action_space)
+
+    @staticmethod
+    def _norm(v, maxv):
+        """
+        Normalization helper, matching WarehouseEnv.
+        """
+        return v / maxv if maxv else 0.0
+
+    def reset_envs(self, mask):
+        """
+        Resets the warehouses selected by a boolean mask.
+        """
+        self.positions[mask] = self.robot_start_pos
+        self.held[mask] = -1
+        self.item_present[mask] = True
+        self.respawn_timers[mask] = 0
+        self.steps[mask] = 0
+        self.deliveries_done[mask] = 0
+        self.metric_counts[mask] = 0
+        self.metric_counts[mask, self.metric_columns["steps_to_first_pickup"]] = -1
+
+    def reset(self):
+        self.reset_envs(np.ones(self.num_envs, dtype=bool))
+        self._reset_seeds()
+        self._reset_options()
+        return self.get_observations()
+
+    def step_async(self, actions):
+        self.actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+
+    def step_wait(self):
+        self.steps += 1
+        reward = np.full(self.num_envs, -1.0, dtype=np.float32)  # step cost
+
+        # -- Propose moves, reject walls and out-of-bounds --
+        proposed = self.positions + self.action_deltas[self.actions]
+        px, py = proposed[:, 0], proposed[:, 1]
+        in_bounds = (px >= 0) & (px < self.map.width) & (py >= 0) & (py < self.map.height)
+        blocked = ~in_bounds
+        blocked[in_bounds] = self.collision_map[px[in_bounds], py[in_bounds]]
+        reward[blocked] -= 5.0  # collision penalty
+        self.positions[~blocked] = proposed[~blocked]
+        if self.metrics is not None:
+            self.metric_counts[:, self.metric_columns["wall_collisions"]] += blocked
+
+        # -- Check pickup: present item at the robot's cell, one lookup per warehouse --
+        cols = self.pickup_grid[self.positions[:, 0], self.positions[:, 1]]
+        picked = cols >= 0
+        picked[picked] = self.item_present[self.rows[picked], cols[picked]]
+        if picked.any():
+            rows, cols = self.rows[picked], cols[picked]
+            self.item_present[rows, cols] = False
+            self.respawn_timers[rows, cols] = self.respawn_delay_steps
+            reward[picked] += 5.0
+            # Only an empty robot takes the item; a full one just removes it
+            empty = self.held[rows] < 0
+            self.held[rows[empty]] = self.station_types[cols[empty]]
+            if self.metrics is not None:
+                counts, columns = self.metric_counts, self.metric_columns
+                counts[rows[empty], columns["pickups"]] += 1
+                counts[rows[~empty], columns["wrong_pickups"]] += 1
+                first = rows[empty][counts[rows[empty], columns["steps_to_first_pickup"]] < 0]
+                counts[first, columns["steps_to_first_pickup"]] = self.steps[first]
+
+        # -- Check delivery: dropzone accepting the held item type at the robot's cell --
+        holding = self.held >= 0
+        if holding.any():
+            zone_ids = self.dropzone_ids[self.positions[:, 0], self.positions[:, 1]]
+            in_dropzone = holding & (zone_ids > 0)
+            # held == -1 indexes the trailing all-False column
+            in_zone = self.zone_accepts[zone_ids, self.held]
+            if self.metrics is not None:
+                self.metric_counts[:, self.metric_columns["deliveries"]] += in_zone
+                self.metric_counts[:, self.metric_columns["wrong_drops"]] += in_dropzone & ~in_zone
+            reward[in_zone] += 10.0
+            self.deliveries_done[in_zone] += 1
+            self.held[in_zone] = -1
+
+        # -- Handle respawn timers --
+        pending = self.respawn_timers > 0
+        if pending.any():
+            self.respawn_timers[pending] -= 1
+            self.item_present |= pending & (self.respawn_timers == 0)
+
+        # -- Check episode termination --
+        dones = (self.steps >= self.max_steps) | (self.deliveries_done >= self.max_deliveries)
+
+        obs = self.get_observations()
+        infos = [{} for _ in range(self.num_envs)]
+        if dones.any():
+            # Auto-reset finished warehouses, keeping their last observation as SB3 expects
+            for idx in np.flatnonzero(dones):
+                infos[idx]["terminal_observation"] = obs[idx].copy()
+                infos[idx]["TimeLimit.truncated"] = False
+                if self.metrics is not None:
+                    self.metric_counts[idx, self.metric_columns["episode_steps"]] = self.steps[idx]
+                    row = self.metric_counts[idx].tolist()
+                    self.metrics.push(row)
+                    infos[idx]["episode_metrics"] = dict(zip(mt.METRIC_FIELDS, row))
+            self.reset_envs(dones)
+            obs = self.get_observations()
+
+        return obs, reward, dones, infos
+
+    def get_observations(self):
+        """
+        Builds the (num_envs, obs_dim) observation batch in the WarehouseEnv layout.
+        """
+        obs = self.obs_buffer
+        obs[:, 0] = self.positions[:, 0] / (self.map.width - 1) if self.map.width > 1 else 0.0
+        obs[:, 1] = self.positions[:, 1] / (self.map.height - 1) if self.map.height > 1 else 0.0
+
+        # -- Held item one-hot --
+        obs[:, 2:4] = 0.0
+        column = self.held_obs_column[self.held]
+        has_column = column >= 0
+        obs[self.rows[has_column], column[has_column]] = 1.0
+
+        return obs.copy()
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        """
+        One result per selected warehouse, like get_attr. "reset" resets only
+        those warehouses and returns their observations; any other method is
+        called once on this VecEnv (the warehouses share it) and its result
+        repeated per index.
+        """
+        indices = list(self._get_indices(indices))
+        if method_name == "reset":
+            mask = np.zeros(self.num_envs, dtype=bool)
+            mask[indices] = True
+            self.reset_envs(mask)
+            obs = self.get_observations()
+            return [obs[idx] for idx in indices]
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        return [result for _ in indices]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
@@ -0,0 +1,285 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import numpy as np
+import pygame
+from Classes import warehouse_env as whe
+from Classes import warehouse_vec_env as wvec
+from Classes import map as m
+from Classes import dropzone as d
+from Classes import map_generator as mg
+from env_config import map_kwargs, env_kwargs
+
+# Benchmark suite for the simulator and training loop.
+# Each benchmark runs `warmup` untimed rounds, then `repeat` timed rounds of `number` operations,
+# and reports ops/sec statistics. Results are written as JSON so runs can be compared:
+#   python benchmark.py --output bench.json
+#   python benchmark.py --compare bench.json   (exit code 1 on regressions)
+
+# Same setup as train_agent.py; metrics stay off so the step benchmarks time the bare env
+MAP_PATHS = [map_kwargs["tmx_path"], "Assets/Maps/Map.tmx"]
+bench_env_kwargs = {**env_kwargs, "collect_metrics": False}
+
+
+def measure(fn, number, warmup=1, repeat=5):
+    """
+    Times `fn(number)` (which performs `number` operations) and returns ops/sec statistics.
+    """
+    for _ in range(warmup):
+        fn(number)
+    rates = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(number)
+        rates.append(number / (time.perf_counter() - start))
+    return {
+        "ops_per_sec": statistics.median(rates),
+        "mean": statistics.mean(rates),
+        "stdev": statistics.stdev(rates) if len(rates) > 1 else 0.0,
+        "min": min(rates),
+        "max": max(rates),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def make_map(tmx_path=None, pickups=None, zones=None, use_compiled=False):
+    kwargs = {**map_kwargs, "use_compiled": use_compiled}
+    if tmx_path is not None:
+        kwargs["tmx_path"] = tmx_path
+    if pickups is not None:
+        kwargs["pickup_locations"] = pickups
+    if zones is not None:
+        kwargs["delivery_zones"] = zones
+    return m.Map(all_sprites_group=pygame.sprite.Group(), render_layer_group=pygame.sprite.Group(), **kwargs)
+
+
+def make_env(game_map=None, render_mode=None, start=None, item_types=None):
+    kwargs = {**bench_env_kwargs, "render_mode": render_mode}
+    if start is not None:
+        kwargs["robot_start_pos"] = start
+    if item_types is not None:
+        kwargs["pickup_item_types"] = item_types
+    return whe.WarehouseEnv(map_obj=game_map or make_map(), **kwargs)
+
+
+def make_vec_env(num_envs):
+    return wvec.WarehouseVecEnv(
+        make_map(), bench_env_kwargs["robot_start_pos"], bench_env_kwargs["pickup_item_types"], num_envs,
+        tile_size=bench_env_kwargs["tile_size"], max_steps=bench_env_kwargs["max_steps"]
+    )
+
+
+def stepper(env, actions):
+    """
+    Returns fn(n): n random env steps with auto-reset.
+    """
+    def run(n):
+        for idx in range(n):
+            _, _, terminated, truncated, _ = env.step(actions[idx % len(actions)])
+            if terminated or truncated:
+                env.reset()
+    return run
+
+
+# ====== Benchmarks ======
+
+def bench_env(args, results):
+    actions = np.random.default_rng(0).integers(4, size=4096)
+
+    env = make_env()
+    env.reset(seed=0)
+    results["env.reset"] = measure(lambda n: [env.reset() for _ in range(n)], args.number, args.warmup, args.repeat)
+    results["env.step.headless"] = measure(stepper(env, actions), args.number, args.warmup, args.repeat)
+    results["env.get_observation"] = measure(
+        lambda n: [env.get_observation() for _ in range(n)], args.number, args.warmup, args.repeat
+    )
+
+    render_modes = ["rgb_array"]
+    if os.environ.get("DISPLAY") or os.environ.get("SDL_VIDEODRIVER") or platform.system() != "Linux":
+        render_modes.append("human")
+    for render_mode in render_modes:
+        env = make_env(render_mode=render_mode)
+        env.reset(seed=0)
+        step = stepper(env, actions)
+        if render_mode == "rgb_array":
+            # rgb_array frames are produced on demand, as a recorder would
+            def step(n, env=env, inner=step):
+                for _ in range(n):
+                    inner(1)
+                    env.render()
+        results[f"env.step.{render_mode}"] = measure(step, max(args.number // 20, 1), args.warmup, args.repeat)
+        env.close()
+
+
+def bench_map(args, results):
+    for tmx_path in MAP_PATHS:
+        name = os.path.splitext(os.path.basename(tmx_path))[0]
+        for use_compiled in (False, True):
+            key = f"map.construct.{name}" + (".compiled" if use_compiled else "")
+            try:
+                results[key] = measure(
+                    lambda n: [make_map(tmx_path, use_compiled=use_compiled) for _ in range(n)],
+                    max(args.number // 100, 1), args.warmup, args.repeat
+                )
+            except Exception as error:
+                results[key] = {"error": str(error)}
+
+
+def bench_ppo(args, results):
+    try:
+        from stable_baselines3 import PPO
+    except ImportError as error:
+        results["ppo.learn"] = {"error": str(error)}
+        return
+    from stable_baselines3.common.vec_env import VecMonitor
+
+    configs = {
+        "ppo.learn.single_env": lambda: make_env(),
+        "ppo.learn.vec_env_16": lambda: VecMonitor(make_vec_env(16)),
+    }
+    for key, env_fn in configs.items():
+        env = env_fn()
+        num_envs = getattr(env, "num_envs", 1)
+        model = PPO(policy="MlpPolicy", env=env, n_steps=max(2048 // num_envs, 64), verbose=0)
+        timesteps = args.ppo_timesteps
+        results[key] = measure(
+            lambda n: model.learn(total_timesteps=n, reset_num_timesteps=False),
+            timesteps, warmup=min(args.warmup, 1), repeat=max(args.repeat // 2, 1)
+        )
+        env.close()
+
+
+def bench_sweeps(args, results):
+    actions = np.random.default_rng(0).integers(4, size=4096)
+
+    # Map size sweep: single env step throughput on open rooms of growing size
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.map_sizes:
+            tmx_path = os.path.join(tmp_dir, f"room_{size}.tmx")
+            zones = {"A": d.Dropzone((size - 4, size - 3), (size - 2, size - 2), "A")}
+            # Floor inside, walls on the border
+            walls = np.ones((size, size), dtype=bool)
+            walls[1:-1, 1:-1] = False
+            mg.write_tmx(mg.WarehouseLayout(size, size, walls, {"A": (2, 2)}, zones, (size // 2, size // 2)), tmx_path)
+            game_map = make_map(tmx_path, pickups={"A": (2, 2)}, zones=zones)
+            env = make_env(game_map, start=(size // 2, size // 2))
+            env.reset(seed=0)
+            results[f"sweep.map_size.{size}.step"] = measure(stepper(env, actions), args.number, args.warmup, args.repeat)
+            results[f"sweep.map_size.{size}.construct"] = measure(
+                lambda n: [make_map(tmx_path, pickups={"A": (2, 2)}, zones=zones) for _ in range(n)],
+                max(args.number // 10_000, 1), args.warmup, args.repeat
+            )
+
+    # Generated warehouse sweep: shelves and aisles, map built in memory from the layout
+    for size in args.map_sizes:
+        layout = mg.generate_warehouse(size, size, seed=0)
+
+        def build(layout=layout):
+            return m.Map(all_sprites_group=pygame.sprite.Group(), render_layer_group=pygame.sprite.Group(),
+                         **layout.map_kwargs())
+
+        env = make_env(build(), start=layout.robot_start_pos, item_types=list(layout.pickup_locations))
+        env.reset(seed=0)
+        results[f"sweep.warehouse.{size}.step"] = measure(stepper(env, actions), args.number, args.warmup, args.repeat)
+        results[f"sweep.warehouse.{size}.construct"] = measure(
+            lambda n, build=build: [build() for _ in range(n)], max(args.number // 10_000, 1), args.warmup, args.repeat
+        )
+
+    # Env count sweep: batched env steps/sec (ops are single-env steps)
+    for num_envs in args.env_counts:
+        vec_env = make_vec_env(num_envs)
+        vec_env.reset()
+        batch_actions = np.random.default_rng(0).integers(4, size=(64, num_envs))
+
+        def run(n, vec_env=vec_env, batch_actions=batch_actions, num_envs=num_envs):
+            for idx in range(n // num_envs):
+                vec_env.step(batch_actions[idx % len(batch_actions)])
+
+        results[f"sweep.env_count.{num_envs}"] = measure(
+            run, max(args.number, num_envs) // num_envs * num_envs, args.warmup, args.repeat
+        )
+
+
+SUITES = {
+    "env": bench_env,
+    "map": bench_map,
+    "ppo": bench_ppo,
+    "sweep": bench_sweeps,
+}
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """
+    Prints ops/sec changes against a baseline JSON; returns the names that regressed.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    for name, stats in results.items():
+        old = baseline.get(name, {})
+        if "ops_per_sec" not in stats or "ops_per_sec" not in old:
+            continue
+        change = stats["ops_per_sec"] / old["ops_per_sec"] - 1.0
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:40s} {old['ops_per_sec']:>14,.1f} -> {stats['ops_per_sec']:>14,.1f} ({change:+.1%}){flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark WarehouseEnv, Map and PPO training throughput.")
+    parser.add_argument("--suite", nargs="+", choices=sorted(SUITES), default=sorted(SUITES))
+    parser.add_argument("--number", type=int, default=20_000, help="Operations per timed round (scaled down for slow benchmarks).")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--ppo-timesteps", type=int, default=4096)
+    parser.add_argument("--map-sizes", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--env-counts", type=int, nargs="+", default=[1, 16, 256, 1024])
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    parser.add_argument("--compare", help="Baseline JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown reported as regression.")
+    args = parser.parse_args()
+
+    results = {}
+    for suite in args.suite:
+        SUITES[suite](args, results)
+
+    for name, stats in results.items():
+        if "error" in stats:
+            print(f"{name:40s} error: {stats['error']}")
+        else:
+            print(f"{name:40s} {stats['ops_per_sec']:>14,.1f} ops/s  (±{stats['stdev']:,.1f})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            raise SystemExit(1)
@@ -0,0 +1,37 @@
+from Classes import dropzone as d
+
+# Shared map and env setup for the baseline layout, imported by the training,
+# evaluation, demo and serving scripts. Keep this free of torch / stable-baselines3
+# so the NumPy-only paths start without loading them.
+
+TMX_PATH = "Assets/Maps/BaselineMap.tmx"
+
+pickup_locations = {
+    "A": (3, 4),
+}
+
+delivery_zones = {
+    "A": d.Dropzone((6, 13), (9, 14), "A"),
+}
+
+robot_start_pos = (14, 4)
+pickup_item_types = ["A"]
+tile_size = 32
+max_steps = 200
+
+# use_compiled: load the memory-mapped map artifact instead of parsing the TMX in every worker
+map_kwargs = dict(
+    tmx_path=TMX_PATH,
+    pickup_locations=pickup_locations,
+    delivery_zones=delivery_zones,
+    use_compiled=True
+)
+
+env_kwargs = dict(
+    robot_start_pos=robot_start_pos,
+    pickup_item_types=pickup_item_types,
+    tile_size=tile_size,
+    max_steps=max_steps,
+    render_mode=None,
+    collect_metrics=True
+)
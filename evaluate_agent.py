@@ -0,0 +1,228 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+import numpy as np
+import pygame
+from Classes import warehouse_env as whe
+from Classes import map as m
+from Classes import metrics as mt
+from Classes import numpy_policy as npp
+from Classes import planner as pl
+from env_config import map_kwargs, env_kwargs
+
+# Headless evaluation of a trained policy over many seeded episodes.
+# Episodes are split across worker processes; each worker steps `--batch-size` envs
+# in lockstep and calls model.predict once per step for all of them.
+#   python evaluate_agent.py --episodes 2000 --workers 8
+#   python evaluate_agent.py --model Models/candidate --baseline Models/warehouse_policy_baseline
+#   (exit code 1 if the candidate is significantly worse than the baseline, or below --min-success)
+
+MODEL_PATH = "Models/warehouse_policy_baseline"
+# --model value that runs the A* expert (planner.ExpertPolicy) as a reference
+EXPERT = "expert"
+
+# Per-episode result columns: the env's metrics, plus the episode return and success
+RESULT_FIELDS = (*mt.METRIC_FIELDS, "return", "success")
+# Columns reported with a confidence interval (steps_to_completion is episode_steps over successes)
+REPORT_FIELDS = ("success", "deliveries", "wall_collisions", "robot_collisions", "wrong_drops", "return",
+                 "steps_to_completion")
+
+
+def run_episodes(model_path, seeds, batch_size, deterministic, random_start):
+    """
+    Worker: runs one episode per seed and returns a (len(seeds), len(RESULT_FIELDS)) array
+    in seed order. With a deterministic policy every row depends only on its seed.
+    A .npz model (see export_policy.py) runs on NumPy alone; torch and stable-baselines3
+    are only imported here for SB3 models. EXPERT acts from the env state with the A* planner.
+    """
+    if model_path == EXPERT:
+        model = None
+    elif model_path.endswith(".npz"):
+        model = npp.NumpyPolicy(model_path)
+    else:
+        import torch
+        from stable_baselines3 import PPO
+
+        torch.set_num_threads(1)
+        torch.manual_seed(int(seeds[0]))
+        # The training schedules are not needed for inference (and may not unpickle across versions)
+        model = PPO.load(model_path, device="cpu", custom_objects={"lr_schedule": 0.0, "clip_range": 0.0})
+    game_map = m.Map(all_sprites_group=pygame.sprite.Group(), render_layer_group=pygame.sprite.Group(), **map_kwargs)
+    free_cells = np.argwhere(~game_map.collision_map)
+
+    envs = [whe.WarehouseEnv(map_obj=game_map, **{**env_kwargs, "collect_metrics": True})
+            for _ in range(min(batch_size, len(seeds)))]
+    if model is None:
+        planner = pl.PathPlanner(game_map)
+        experts = [pl.ExpertPolicy(env, planner) for env in envs]
+    obs = np.zeros((len(envs), *envs[0].observation_space.shape), dtype=envs[0].observation_space.dtype)
+    returns = np.zeros(len(envs))
+    results = np.zeros((len(seeds), len(RESULT_FIELDS)))
+    episode_of = [-1] * len(envs)  # episode each env is running, -1 when done
+    next_episode = 0
+
+    def start(env_idx):
+        nonlocal next_episode
+        if next_episode == len(seeds):
+            episode_of[env_idx] = -1
+            return
+        env, seed = envs[env_idx], int(seeds[next_episode])
+        if random_start:
+            env.robot_start_pos = tuple(free_cells[np.random.default_rng(seed).integers(len(free_cells))].tolist())
+        obs[env_idx] = env.reset(seed=seed)[0]
+        returns[env_idx] = 0.0
+        episode_of[env_idx] = next_episode
+        next_episode += 1
+
+    for env_idx in range(len(envs)):
+        start(env_idx)
+
+    while True:
+        active = [env_idx for env_idx, episode in enumerate(episode_of) if episode >= 0]
+        if not active:
+            break
+        if model is None:
+            actions = [experts[env_idx].act() for env_idx in active]
+        else:
+            # One forward pass for every running episode
+            actions, _ = model.predict(obs[active], deterministic=deterministic)
+        for env_idx, action in zip(active, actions):
+            env = envs[env_idx]
+            observation, reward, terminated, truncated, info = env.step(action)
+            returns[env_idx] += reward
+            if terminated or truncated:
+                episode = info["episode_metrics"]
+                results[episode_of[env_idx]] = [
+                    *(episode[name] for name in mt.METRIC_FIELDS),
+                    returns[env_idx],
+                    episode["deliveries"] >= env.max_deliveries,
+                ]
+                start(env_idx)
+            else:
+                obs[env_idx] = observation
+    return results
+
+
+def evaluate(model_path, seeds, workers, batch_size, deterministic, random_start):
+    """
+    Runs every seed across `workers` processes (0 = in this process) and returns the
+    per-episode results in seed order.
+    """
+    if workers == 0:
+        return run_episodes(model_path, seeds, batch_size, deterministic, random_start)
+    chunks = [chunk for chunk in np.array_split(seeds, workers) if len(chunk)]
+    # Spawned workers, so no torch or pygame state is inherited through fork
+    with ProcessPoolExecutor(len(chunks), mp_context=mp.get_context("spawn")) as pool:
+        parts = pool.map(run_episodes, [model_path] * len(chunks), chunks, [batch_size] * len(chunks),
+                         [deterministic] * len(chunks), [random_start] * len(chunks))
+        return np.concatenate(list(parts))
+
+
+def confidence_interval(values, z=1.96):
+    """
+    Mean and normal-approximation confidence interval of the mean.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return {"mean": float("nan"), "low": float("nan"), "high": float("nan"), "n": 0}
+    mean = float(values.mean())
+    half = z * float(values.std(ddof=1)) / math.sqrt(len(values)) if len(values) > 1 else 0.0
+    return {"mean": mean, "low": mean - half, "high": mean + half, "n": len(values)}
+
+
+def wilson_interval(successes, n, z=1.96):
+    """
+    Success rate with a Wilson score interval (stays inside [0, 1] near 0% and 100%).
+    """
+    if n == 0:
+        return {"mean": float("nan"), "low": float("nan"), "high": float("nan"), "n": 0}
+    rate = successes / n
+    denominator = 1 + z * z / n
+    centre = (rate + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(rate * (1 - rate) / n + z * z / (4 * n * n)) / denominator
+    return {"mean": rate, "low": max(centre - half, 0.0), "high": min(centre + half, 1.0), "n": n}
+
+
+def summarize(results, z=1.96):
+    """
+    Report of success rate, deliveries, collisions, return and steps-to-completion.
+    """
+    columns = dict(zip(RESULT_FIELDS, results.T))
+    success = columns["success"].astype(bool)
+    report = {}
+    for name in REPORT_FIELDS:
+        if name == "success":
+            report[name] = wilson_interval(int(success.sum()), len(success), z)
+        elif name == "steps_to_completion":
+            report[name] = confidence_interval(columns["episode_steps"][success], z)
+        else:
+            report[name] = confidence_interval(columns[name], z)
+    return report
+
+
+def print_report(title, report):
+    print(f"\n{title}")
+    print(f"{'metric':<22}{'mean':>12}{'95% CI':>24}{'n':>8}")
+    for name, stats in report.items():
+        interval = f"[{stats['low']:.3f}, {stats['high']:.3f}]"
+        print(f"{name:<22}{stats['mean']:>12.3f}{interval:>24}{stats['n']:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate a trained policy over many seeded episodes.")
+    parser.add_argument("--model", default=MODEL_PATH, help=f"Model to evaluate, or {EXPERT!r} for the A* expert.")
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="Episode i uses seed + i.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Worker processes; 0 runs everything in this process.")
+    parser.add_argument("--batch-size", type=int, default=64, help="Envs stepped in lockstep per worker.")
+    parser.add_argument("--stochastic", action="store_true", help="Sample actions instead of taking the most likely one.")
+    parser.add_argument("--random-start", action="store_true",
+                        help="Start each episode on a free cell drawn from its seed instead of robot_start_pos.")
+    parser.add_argument("--baseline", help="Also evaluate this model on the same seeds and compare.")
+    parser.add_argument("--min-success", type=float, help="Fail if the success rate is below this value.")
+    parser.add_argument("--output", help="Write the report (and per-episode results) as JSON.")
+    args = parser.parse_args()
+
+    seeds = np.arange(args.seed, args.seed + args.episodes)
+    deterministic = not args.stochastic
+    start_time = time.perf_counter()
+    results = evaluate(args.model, seeds, args.workers, args.batch_size, deterministic, args.random_start)
+    elapsed = time.perf_counter() - start_time
+    steps = int(results[:, RESULT_FIELDS.index("episode_steps")].sum())
+    report = summarize(results)
+    print_report(f"{args.model}: {args.episodes} episodes, {steps} steps in {elapsed:.1f}s "
+                 f"({steps / elapsed:,.0f} steps/sec)", report)
+    output = {"model": args.model, "seeds": [args.seed, args.seed + args.episodes], "report": report,
+              "results": {name: column.tolist() for name, column in zip(RESULT_FIELDS, results.T)}}
+
+    failed = []
+    if args.min_success is not None and report["success"]["mean"] < args.min_success:
+        failed.append(f"success rate {report['success']['mean']:.3f} < {args.min_success}")
+
+    if args.baseline:
+        baseline = evaluate(args.baseline, seeds, args.workers, args.batch_size, deterministic, args.random_start)
+        print_report(f"baseline {args.baseline}", summarize(baseline))
+        # Same seeds for both models, so compare per episode (paired differences)
+        comparison = {}
+        for name in ("success", "deliveries"):
+            column = RESULT_FIELDS.index(name)
+            comparison[name] = confidence_interval(results[:, column] - baseline[:, column])
+            if comparison[name]["high"] < 0:
+                failed.append(f"{name} is significantly lower than the baseline")
+        print_report("model - baseline (paired)", comparison)
+        output["baseline"] = {"model": args.baseline, "report": summarize(baseline), "difference": comparison}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if failed:
+        print("\nFAILED: " + "; ".join(failed))
+        sys.exit(1)
@@ -0,0 +1,19 @@
+import argparse
+from stable_baselines3 import PPO
+from Classes import numpy_policy as npp
+
+# Converts a trained PPO MlpPolicy into a NumPy-only .npz (see Classes/numpy_policy.py):
+#   python export_policy.py                      -> Models/warehouse_policy_baseline.npz
+#   python evaluate_agent.py --model Models/warehouse_policy_baseline.npz
+
+parser = argparse.ArgumentParser(description="Export a trained policy for NumPy inference.")
+parser.add_argument("--model", default="Models/warehouse_policy_baseline", help="SB3 model to export.")
+parser.add_argument("--output", help="Target .npz (default: next to the model).")
+args = parser.parse_args()
+
+output = args.output or args.model.removesuffix(".zip") + ".npz"
+
+# The training schedules are not needed for inference (and may not unpickle across versions)
+model = PPO.load(args.model, device="cpu", custom_objects={"lr_schedule": 0.0, "clip_range": 0.0})
+npp.export_policy(model, output)
+print(f"Exported {args.model} to {output}")
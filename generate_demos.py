@@ -0,0 +1,67 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+import numpy as np
+import pygame
+from Classes import warehouse_env as whe
+from Classes import map as m
+from Classes import planner as pl
+from Classes import trajectory as traj
+from env_config import map_kwargs, env_kwargs
+
+# Expert demonstrations from the A* planner (Classes/planner.py), recorded as trajectory
+# datasets (Classes/trajectory.py) in one part_<worker> directory per worker process:
+#   python generate_demos.py --episodes 10000 --workers 8 --output Demos/expert
+#   python train_agent.py --demos Demos/expert      (behavior-cloning warm start)
+# Each episode starts on a free cell drawn from its seed, so demonstrations cover the map.
+
+
+def record_part(part, seeds, output, chunk_size):
+    """
+    Worker: records one expert episode per seed into output/part_<part>.
+    Returns (transitions, planner cache hits, misses).
+    """
+    game_map = m.Map(all_sprites_group=pygame.sprite.Group(), render_layer_group=pygame.sprite.Group(), **map_kwargs)
+    free_cells = np.argwhere(~game_map.collision_map)
+    env = whe.WarehouseEnv(map_obj=game_map, **{**env_kwargs, "collect_metrics": False})
+    expert = pl.ExpertPolicy(env)
+    transitions = 0
+    with traj.TrajectoryRecorder(os.path.join(output, f"part_{part:03d}"), env, chunk_size=chunk_size) as recorder:
+        for seed in seeds.tolist():
+            env.robot_start_pos = tuple(free_cells[np.random.default_rng(seed).integers(len(free_cells))].tolist())
+            obs, _ = env.reset(seed=seed)
+            recorder.record_reset(obs, seed=seed)
+            done = False
+            while not done:
+                action = expert.act()
+                obs, reward, terminated, truncated, _ = env.step(action)
+                recorder.record_step(action, obs, reward, terminated, truncated)
+                done = terminated or truncated
+                transitions += 1
+    return transitions, expert.planner.hits, expert.planner.misses
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate expert demonstrations with the A* planner.")
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="Episode i uses seed + i.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default="Demos/expert")
+    parser.add_argument("--chunk-size", type=int, default=65536, help="Rows per trajectory chunk file.")
+    args = parser.parse_args()
+
+    seeds = np.arange(args.seed, args.seed + args.episodes)
+    chunks = [chunk for chunk in np.array_split(seeds, max(args.workers, 1)) if len(chunk)]
+    start = time.perf_counter()
+    # Spawned workers, so no pygame state is inherited through fork
+    with ProcessPoolExecutor(len(chunks), mp_context=mp.get_context("spawn")) as pool:
+        parts = list(pool.map(record_part, range(len(chunks)), chunks, [args.output] * len(chunks),
+                              [args.chunk_size] * len(chunks)))
+    elapsed = time.perf_counter() - start
+
+    transitions, hits, misses = (sum(values) for values in zip(*parts))
+    print(f"{transitions} transitions from {args.episodes} episodes in {elapsed:.1f}s "
+          f"({transitions / elapsed:,.0f}/sec) -> {args.output}")
+    print(f"Path cache: {hits} hits, {misses} searches ({hits / max(hits + misses, 1):.1%} hit rate)")
@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+import json
+import time
+import pygame
+from Classes import warehouse_env as whe
+from Classes import map as m
+from Classes import numpy_policy as npp
+from Classes import inference_server as inf
+from env_config import map_kwargs, env_kwargs
+
+# Batched policy inference for many robot controllers (see Classes/inference_server.py).
+#   python serve_policy.py --port 8765                 serve observations over TCP until interrupted
+#   python serve_policy.py --fleet 256 --steps 500     drive a simulated fleet in-process and print stats
+#   python serve_policy.py --fleet 64 --socket         same, with every env on its own TCP connection
+
+parser = argparse.ArgumentParser(description="Serve batched policy actions.")
+parser.add_argument("--model", default="Models/warehouse_policy_baseline.npz",
+                    help="Exported .npz (export_policy.py) or an SB3 model.")
+parser.add_argument("--host", default="127.0.0.1")
+parser.add_argument("--port", type=int, default=8765)
+parser.add_argument("--max-batch-size", type=int, default=256)
+parser.add_argument("--max-latency-ms", type=float, default=2.0)
+parser.add_argument("--fleet", type=int, default=0, help="Simulated robots; 0 only serves.")
+parser.add_argument("--steps", type=int, default=500, help="Steps per simulated robot.")
+parser.add_argument("--socket", action="store_true", help="Connect the simulated fleet over TCP.")
+args = parser.parse_args()
+
+
+def load_policy(path):
+    if path.endswith(".npz"):
+        return npp.NumpyPolicy(path)
+    from stable_baselines3 import PPO
+    # The training schedules are not needed for inference (and may not unpickle across versions)
+    return PPO.load(path, device="cpu", custom_objects={"lr_schedule": 0.0, "clip_range": 0.0})
+
+
+async def main():
+    game_map = m.Map(all_sprites_group=pygame.sprite.Group(), render_layer_group=pygame.sprite.Group(), **map_kwargs)
+    envs = [whe.WarehouseEnv(map_obj=game_map, **env_kwargs) for _ in range(max(args.fleet, 1))]
+    server = inf.BatchingInferenceServer(
+        load_policy(args.model), envs[0].observation_space.shape,
+        max_batch_size=args.max_batch_size, max_latency_ms=args.max_latency_ms
+    )
+    async with server:
+        if args.fleet == 0 or args.socket:
+            tcp = await server.serve(args.host, args.port)
+            print(f"Serving {args.model} on {args.host}:{args.port}")
+        if args.fleet == 0:
+            async with tcp:
+                await tcp.serve_forever()
+
+        if args.socket:
+            clients = [await inf.InferenceClient.connect(args.host, args.port) for _ in envs]
+            predict = [client.predict for client in clients]
+        else:
+            predict = server.predict
+        start = time.perf_counter()
+        steps = await inf.run_fleet(envs, predict, args.steps)
+        elapsed = time.perf_counter() - start
+        if args.socket:
+            for client in clients:
+                await client.close()
+            tcp.close()
+
+        print(f"{args.fleet} robots, {steps} steps in {elapsed:.2f}s ({steps / elapsed:,.0f} actions/sec)")
+        print(json.dumps(server.stats(), indent=2))
+
+
+asyncio.run(main())
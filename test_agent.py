@@ -1,75 +1,95 @@
+import argparse
 import pygame
 from stable_baselines3 import PPO
 from Classes import warehouse_env as whe
 from Classes import map as m
-from Classes import dropzone as d
+from Classes import recorder as rec
+from Classes import trajectory as traj
+from env_config import map_kwargs, env_kwargs
 import time
 
+# Without --record the episode is shown in a window; with it, frames are rendered
+# off-screen and written by a background thread (video file needs ffmpeg, else PNG directory)
+parser = argparse.ArgumentParser(description="Run the trained policy for one episode.")
+parser.add_argument("--record", help="Record the episode to a video file (.mp4, ...) or a PNG directory.")
+parser.add_argument("--trajectory", help="Also store every transition in this trajectory directory (see Classes/trajectory.py).")
+parser.add_argument("--episodes", type=int, default=1, help="Number of episodes to run.")
+parser.add_argument("--replay", help="Replay an episode from this trajectory directory instead of running the policy.")
+parser.add_argument("--episode", type=int, default=0, help="Episode index to replay.")
+args = parser.parse_args()
+
 # Pygame init
 pygame.init()
-pygame.display.set_mode((1, 1))  # to satisfy pytmx loading
-
-# Setup map just like in training
-TMX_PATH = "Assets/Maps/BaselineMap.tmx"
-
-pickup_locations = {
-    "A": (3, 4),
-}
-
-delivery_zones = {
-    "A": d.Dropzone((6, 13), (9, 14), "A"),
-}
 
+# Setup map and env just like in training
 all_sprites_group = pygame.sprite.Group()
 render_layer_group = pygame.sprite.Group()
 
 game_map = m.Map(
-    tmx_path=TMX_PATH,
     all_sprites_group=all_sprites_group,
     render_layer_group=render_layer_group,
-    pickup_locations=pickup_locations,
-    delivery_zones=delivery_zones
+    **map_kwargs
 )
 
-robot_start_pos = (14, 4)
-pickup_item_types = ["A"]
-tile_size = 32
-max_steps = 200
-
 # Create environment
 env = whe.WarehouseEnv(
     map_obj=game_map,
-    robot_start_pos=robot_start_pos,
-    pickup_item_types=pickup_item_types,
-    tile_size=tile_size,
-    max_steps=max_steps
+    **{**env_kwargs, "collect_metrics": False, "render_mode": "rgb_array" if args.record else "human"}
 )
+recorder = rec.EpisodeRecorder(args.record, fps=env.metadata["render_fps"]) if args.record else None
 
-# Load the trained model
-model = PPO.load("Models/warehouse_policy_baseline")
-
-# Run one test episode
-obs, _ = env.reset()
-done = False
+# Steps of the last episode run or replayed (stays 0 with --episodes 0)
 step_count = 0
 
-while not done:
-    # Model chooses an action based on the current observation
-    action, _states = model.predict(obs, deterministic=True)
-
-    # Environment transitions
-    obs, reward, done, truncated, info = env.step(action)
-
-    # Render to Pygame window
-    env.render()
+if args.replay:
+    # Deterministic replay of a recorded episode; the policy is not needed
+    dataset = traj.TrajectoryDataset(args.replay)
+    for frame in dataset.replay(env, args.episode):
+        if recorder:
+            recorder.add_frame(frame)
+        else:
+            pygame.time.wait(200)
+        step_count += 1
+    args.episodes = 0
 
-    # OPTIONAL: slow it down for human eyes
-    pygame.time.wait(200)  # 200ms delay between steps
-
-    step_count += 1
+# Load the trained model
+model = PPO.load("Models/warehouse_policy_baseline") if args.episodes else None
+trajectory = traj.TrajectoryRecorder(args.trajectory, env) if args.trajectory else None
+
+for episode in range(args.episodes):
+    # Run one test episode
+    obs, _ = env.reset()
+    if trajectory:
+        trajectory.record_reset(obs)
+    done = False
+    step_count = 0
+
+    while not done:
+        # Model chooses an action based on the current observation
+        action, _states = model.predict(obs, deterministic=True)
+
+        # Environment transitions (renders to the Pygame window in "human" mode)
+        obs, reward, done, truncated, info = env.step(action)
+        if trajectory:
+            trajectory.record_step(action, obs, reward, done, truncated)
+
+        if recorder:
+            # Zero-copy view of the frame; the recorder copies it into its queue
+            recorder.add_frame(env.render())
+        else:
+            # OPTIONAL: slow it down for human eyes
+            pygame.time.wait(200)  # 200ms delay between steps
+
+        step_count += 1
 
 print(f"Test run complete in {step_count} steps.")
 
 # Clean up
+if trajectory:
+    trajectory.close()
+    print(f"Stored {trajectory.total_rows} rows of {len(trajectory.episodes)} episodes in {args.trajectory}")
+if recorder:
+    recorder.close()
+    print(f"Recorded {recorder.frames_written} frames to {args.record}")
 env.close()
 pygame.quit()
\ No newline at end of file
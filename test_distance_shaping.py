@@ -0,0 +1,82 @@
+import numpy as np
+from Classes import warehouse_env as whe
+from Classes import robot as r
+from Classes import map as m
+from Classes import dropzone as d
+import pygame
+
+# Distance shaping must reward progress towards the goal a step started with,
+# so reaching a pickup or a dropzone is never penalized for the next goal being far away
+TMX_PATH = "Assets/Maps/BaselineMap.tmx"
+
+pickup_locations = {
+    "A": (3, 4),
+}
+
+delivery_zones = {
+    "A": d.Dropzone((6, 13), (9, 14), "A"),
+}
+
+game_map = m.Map(
+    tmx_path=TMX_PATH,
+    all_sprites_group=pygame.sprite.Group(),
+    render_layer_group=pygame.sprite.Group(),
+    pickup_locations=pickup_locations,
+    delivery_zones=delivery_zones
+)
+
+env = whe.WarehouseEnv(game_map, (14, 4), ["A"], max_steps=200, distance_shaping=1.0)
+env.reset(seed=0)
+rng = np.random.default_rng(0)
+pickups = deliveries = 0
+
+
+def greedy_action(robot):
+    """
+    The move that lowers the BFS distance to the robot's current goal the most.
+    """
+    field = game_map.dropzone_distances["A"] if robot.held_item_type else game_map.pickup_distances["A"]
+    best_action, best_distance = 0, None
+    for action, (dx, dy) in r.Robot.ACTIONS.items():
+        distance = int(field[robot.grid_x + dx, robot.grid_y + dy])
+        if distance >= 0 and (best_distance is None or distance < best_distance):
+            best_action, best_distance = action, distance
+    return best_action
+
+
+for step in range(5000):
+    robot = env.robot
+    action = greedy_action(robot) if rng.random() < 0.8 else int(rng.integers(4))
+    _, reward, terminated, truncated, _ = env.step(action)
+    if robot.just_picked_up:
+        pickups += 1
+        assert reward >= -1.0 + 5.0, (step, reward)
+    if robot.just_delivered:
+        deliveries += 1
+        assert reward >= -1.0 + 10.0, (step, reward)
+    if terminated or truncated:
+        env.reset()
+
+assert pickups and deliveries
+print(f"Shaping check passed: {pickups} pickups and {deliveries} deliveries never penalized.")
+
+# With several stations per type, distances (and so shaping) only lead to stations holding an item
+two_station_map = m.Map(
+    tmx_path=TMX_PATH,
+    all_sprites_group=pygame.sprite.Group(),
+    render_layer_group=pygame.sprite.Group(),
+    pickup_locations={"A": [(3, 4), (12, 4)]},
+    delivery_zones=delivery_zones
+)
+env = whe.WarehouseEnv(two_station_map, (14, 4), ["A"], max_steps=200, distance_features=True)
+env.reset(seed=0)
+robot = env.robot
+near, far = sorted(range(2), key=lambda station: abs(env.station_positions[station][0] - robot.grid_x))
+assert env.pickup_distance(robot) == two_station_map.distance_to_station(env.station_map_ids[near], robot.grid_x, robot.grid_y)
+
+env.item_present[near] = False
+env.items_available[0] -= 1
+far_distance = two_station_map.distance_to_station(env.station_map_ids[far], robot.grid_x, robot.grid_y)
+assert far_distance > 2
+assert env.pickup_distance(robot) == far_distance, (env.pickup_distance(robot), far_distance)
+print("Empty station check passed.")
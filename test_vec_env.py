@@ -0,0 +1,71 @@
+import numpy as np
+from Classes import warehouse_env as whe
+from Classes import warehouse_vec_env as wvec
+from Classes import map as m
+from Classes import dropzone as d
+import pygame
+
+# Parity check: WarehouseVecEnv must match N scalar WarehouseEnv instances step for step
+TMX_PATH = "Assets/Maps/BaselineMap.tmx"
+
+pickup_locations = {
+    "A": (3, 4),
+}
+
+delivery_zones = {
+    "A": d.Dropzone((6, 13), (9, 14), "A"),
+}
+
+game_map = m.Map(
+    tmx_path=TMX_PATH,
+    all_sprites_group=pygame.sprite.Group(),
+    render_layer_group=pygame.sprite.Group(),
+    pickup_locations=pickup_locations,
+    delivery_zones=delivery_zones
+)
+
+robot_start_pos = (14, 4)
+pickup_item_types = ["A"]
+max_steps = 200
+num_envs = 16
+num_steps = 3000
+
+envs = [
+    whe.WarehouseEnv(game_map, robot_start_pos, pickup_item_types, max_steps=max_steps)
+    for _ in range(num_envs)
+]
+vec_env = wvec.WarehouseVecEnv(game_map, robot_start_pos, pickup_item_types, num_envs, max_steps=max_steps)
+
+obs = np.stack([env.reset()[0] for env in envs])
+vec_obs = vec_env.reset()
+assert np.array_equal(obs, vec_obs)
+
+# Mostly head for the pickup and the dropzone so every event gets exercised
+rng = np.random.default_rng(0)
+targets = np.array([pickup_locations["A"], (7, 13)])
+deliveries = 0
+
+for step in range(num_steps):
+    actions = rng.integers(4, size=num_envs)
+    target = targets[(vec_env.held >= 0).astype(int)]
+    dx = target[:, 0] - vec_env.positions[:, 0]
+    dy = target[:, 1] - vec_env.positions[:, 1]
+    greedy = np.where(dx != 0, np.where(dx < 0, 0, 1), np.where(dy < 0, 2, 3))
+    actions = np.where(rng.random(num_envs) < 0.7, greedy, actions)
+
+    vec_obs, vec_rewards, vec_dones, vec_infos = vec_env.step(actions)
+
+    for idx, env in enumerate(envs):
+        obs, reward, terminated, truncated, info = env.step(actions[idx])
+        assert reward == vec_rewards[idx], (step, idx, reward, vec_rewards[idx])
+        assert terminated == vec_dones[idx], (step, idx)
+        if terminated:
+            assert np.array_equal(obs, vec_infos[idx]["terminal_observation"]), (step, idx)
+            deliveries += env.deliveries_done
+            terminal_obs = obs
+            obs, _ = env.reset()
+            # reset() must not write into the array step() handed out
+            assert np.array_equal(terminal_obs, vec_infos[idx]["terminal_observation"]), (step, idx)
+        assert np.array_equal(obs, vec_obs[idx]), (step, idx, obs, vec_obs[idx])
+
+print(f"Parity check passed: {num_envs} envs x {num_steps} steps, {deliveries} deliveries in finished episodes.")
@@ -1,15 +1,19 @@
+import argparse
+import glob
+import os
+import numpy as np
 import pygame
+import torch
 from stable_baselines3 import PPO
 from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.vec_env import VecMonitor
 from Classes import warehouse_env as whe
 from Classes import map as m
-from Classes import dropzone as d
+from Classes import shared_memory_vec_env as shm_vec
+from Classes import trajectory as traj
+from env_config import map_kwargs, env_kwargs
 import time
 
-# Pygame init
-pygame.init()
-pygame.display.set_mode((1, 1))
-
 class SlowDownCallback(BaseCallback):
     """
     Simple SB3 callback to slow down training steps with a sleep delay.
@@ -22,64 +26,134 @@ class SlowDownCallback(BaseCallback):
         time.sleep(self.delay_s)
         return True
 
-# Setup
-TMX_PATH = "Assets/Maps/BaselineMap.tmx"
-
-pickup_locations = {
-    "A": (3, 4),
-}
-
-delivery_zones = {
-    "A": d.Dropzone((6, 13), (9, 14), "A"),
-}
-
-all_sprites_group = pygame.sprite.Group()
-render_layer_group = pygame.sprite.Group()
-
-game_map = m.Map(
-    tmx_path=TMX_PATH,
-    all_sprites_group=all_sprites_group,
-    render_layer_group=render_layer_group,
-    pickup_locations=pickup_locations,
-    delivery_zones=delivery_zones
-)
-
-robot_start_pos = (14, 4)
-pickup_item_types = ["A"]
-tile_size = 32
-max_steps = 200
-
-# Create Environment
-env = whe.WarehouseEnv(
-    map_obj=game_map,
-    robot_start_pos=robot_start_pos,
-    pickup_item_types=pickup_item_types,
-    tile_size=tile_size,
-    max_steps=max_steps
-)
-
-# Baseline TensorBoard log directory
-log_dir = f"./tensorboard_logs/run_{int(time.time())}/"
-
-# PPO Agent with TensorBoard logging
-model = PPO(
-    policy="MlpPolicy",
-    env=env,
-    verbose=1,
-    tensorboard_log=log_dir
-)
-
-# slow_callback = SlowDownCallback(delay_s=0.02)
-
-# Train with slowdown
-TOTAL_TIMESTEPS = 100_000
-model.learn(total_timesteps=TOTAL_TIMESTEPS)
+class CollectionSpeedCallback(BaseCallback):
+    """
+    SB3 callback that reports how many env steps/sec rollout collection reaches
+    (policy forward passes included, PPO updates excluded).
+    """
+    def __init__(self, verbose=1):
+        super().__init__(verbose)
+        self.rollout_start = 0.0
+        self.rollout_steps = 0
 
-# Save Model
-model.save("Models/warehouse_policy_baseline")
+    def _on_rollout_start(self) -> None:
+        self.rollout_start = time.perf_counter()
+        self.rollout_steps = 0
 
-print("Baseline training complete. Model saved as 'warehouse_policy_baseline.zip'.")
+    def _on_step(self) -> bool:
+        self.rollout_steps += self.training_env.num_envs
+        return True
+
+    def _on_rollout_end(self) -> None:
+        steps_per_sec = self.rollout_steps / max(time.perf_counter() - self.rollout_start, 1e-9)
+        self.logger.record("rollout/collected_steps_per_sec", steps_per_sec)
+        if self.verbose:
+            print(f"Collected {self.rollout_steps} steps at {steps_per_sec:,.0f} steps/sec")
+
+class MetricsCallback(BaseCallback):
+    """
+    SB3 callback that writes the `episode_metrics` info of finished episodes
+    to the logger (and so to TensorBoard) as running means under warehouse/.
+    """
+    def _on_step(self) -> bool:
+        for info in self.locals["infos"]:
+            episode_metrics = info.get("episode_metrics")
+            if episode_metrics is not None:
+                for name, value in episode_metrics.items():
+                    if name == "steps_to_first_pickup" and value < 0:
+                        continue
+                    self.logger.record_mean(f"warehouse/{name}", value)
+        return True
+
+def behavior_clone(model, demo_dir, updates=2000, batch_size=256, learning_rate=1e-3, seed=0):
+    """
+    Warm-starts the policy on expert demonstrations (generate_demos.py): maximizes
+    the log-likelihood of the expert's actions on batches sampled from the
+    trajectory parts in demo_dir. Returns the final loss.
+    """
+    parts = [traj.TrajectoryDataset(path) for path in sorted(glob.glob(os.path.join(demo_dir, "part_*")))]
+    if not parts:
+        parts = [traj.TrajectoryDataset(demo_dir)]
+    weights = np.array([len(part) for part in parts], dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    optimizer = torch.optim.Adam(model.policy.parameters(), lr=learning_rate)
+
+    for update in range(updates):
+        batch = parts[rng.choice(len(parts), p=weights / weights.sum())].sample(batch_size, rng)
+        obs = torch.as_tensor(batch["obs"], device=model.device)
+        actions = torch.as_tensor(batch["action"], device=model.device)
+        loss = -model.policy.get_distribution(obs).log_prob(actions).mean()
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+        if (update + 1) % 500 == 0:
+            print(f"Behavior cloning {update + 1}/{updates}: loss {loss.item():.4f}")
+    return loss.item()
+
+TOTAL_TIMESTEPS = 100_000
 
-# Clean up
-env.close()
-pygame.quit()
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the warehouse PPO agent.")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Rollout worker processes; 0 runs a single env in this process.")
+    parser.add_argument("--envs-per-worker", type=int, default=1,
+                        help="WarehouseEnv instances stepped by each worker.")
+    parser.add_argument("--timesteps", type=int, default=TOTAL_TIMESTEPS)
+    parser.add_argument("--demos", help="Expert demonstrations (generate_demos.py) to warm-start the policy on.")
+    parser.add_argument("--bc-updates", type=int, default=2000, help="Behavior-cloning gradient steps with --demos.")
+    args = parser.parse_args()
+
+    # Pygame init (no display needed: the env runs headless while training)
+    pygame.init()
+
+    # Create Environment
+    if args.workers > 0:
+        # Each worker builds its own Map from the TMX and shares results through shared memory
+        env = VecMonitor(shm_vec.SharedMemoryVecEnv(
+            map_kwargs=map_kwargs,
+            env_kwargs=env_kwargs,
+            num_workers=args.workers,
+            envs_per_worker=args.envs_per_worker
+        ))
+    else:
+        all_sprites_group = pygame.sprite.Group()
+        render_layer_group = pygame.sprite.Group()
+
+        game_map = m.Map(
+            all_sprites_group=all_sprites_group,
+            render_layer_group=render_layer_group,
+            **map_kwargs
+        )
+
+        env = whe.WarehouseEnv(map_obj=game_map, **env_kwargs)
+
+    # Baseline TensorBoard log directory
+    log_dir = f"./tensorboard_logs/run_{int(time.time())}/"
+
+    # PPO Agent with TensorBoard logging
+    model = PPO(
+        policy="MlpPolicy",
+        env=env,
+        verbose=1,
+        tensorboard_log=log_dir
+    )
+
+    if args.demos:
+        behavior_clone(model, args.demos, updates=args.bc_updates)
+
+    # slow_callback = SlowDownCallback(delay_s=0.02)
+    speed_callback = CollectionSpeedCallback()
+    # Deliveries, collisions, wrong drops, ... per episode under warehouse/ in TensorBoard
+    metrics_callback = MetricsCallback()
+
+    # Train with slowdown
+    model.learn(total_timesteps=args.timesteps, callback=[speed_callback, metrics_callback])
+
+    # Save Model
+    model.save("Models/warehouse_policy_baseline")
+
+    print("Baseline training complete. Model saved as 'warehouse_policy_baseline.zip'.")
+
+    # Clean up
+    env.close()
+    pygame.quit()